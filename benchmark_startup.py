@@ -0,0 +1,93 @@
+"""测量各个图形界面工具的冷启动时间
+
+每次测量都启动一个全新的Python进程，分别记录：
+- import: 导入界面模块所需时间
+- window: 创建Tk窗口并完成首次绘制所需时间（没有图形环境时为空）
+- total: 从启动进程到窗口出现的总耗时（包含解释器启动）
+
+用法: python benchmark_startup.py [--runs 5] [--json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (名称, 工具目录, 模块名, 界面类名)
+TARGETS = [
+    ("steam_analyzer_ui", os.path.join(ROOT, "steam游戏数据分析"), "steam_analyzer_ui", "SteamAnalyzerUI"),
+    ("roulette", os.path.join(ROOT, "游戏轮盘"), "roulette", "FolderRoulette"),
+]
+
+CHILD_CODE = r"""
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import importlib
+module = importlib.import_module(sys.argv[2])
+imported = time.perf_counter()
+result = {"import": imported - start, "window": None, "modules": len(sys.modules),
+          "heavy": sorted(m for m in ("pandas", "matplotlib", "seaborn", "numpy", "requests", "PIL") if m in sys.modules)}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except Exception:
+    root = None
+if root is not None:
+    app = getattr(module, sys.argv[3])(root)
+    root.update()
+    result["window"] = time.perf_counter() - imported
+    root.destroy()
+print(json.dumps(result))
+"""
+
+
+def measure(directory, module, class_name):
+    """在新进程中启动一次界面，返回各阶段耗时"""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD_CODE, directory, module, class_name],
+                            cwd=directory, capture_output=True, text=True, check=True).stdout
+    total = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result["total"] = total
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量图形界面工具的冷启动时间")
+    parser.add_argument('--runs', type=int, default=5, help="每个工具的测量次数")
+    parser.add_argument('--json', action='store_true', help="以JSON格式输出结果")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for name, directory, module, class_name in TARGETS:
+        runs = [measure(directory, module, class_name) for _ in range(args.runs)]
+        windows = [run["window"] for run in runs if run["window"] is not None]
+        report[name] = {
+            "runs": args.runs,
+            "import_median": statistics.median(run["import"] for run in runs),
+            "window_median": statistics.median(windows) if windows else None,
+            "total_median": statistics.median(run["total"] for run in runs),
+            "total_min": min(run["total"] for run in runs),
+            "heavy_modules": runs[-1]["heavy"],
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    for name, stats in report.items():
+        window = f"{stats['window_median'] * 1000:.0f}ms" if stats['window_median'] is not None else "无图形环境"
+        print(f"{name}:")
+        print(f"  导入耗时(中位数): {stats['import_median'] * 1000:.0f}ms")
+        print(f"  窗口创建(中位数): {window}")
+        print(f"  总启动耗时: 中位数 {stats['total_median'] * 1000:.0f}ms, 最快 {stats['total_min'] * 1000:.0f}ms")
+        print(f"  启动时已加载的重型模块: {', '.join(stats['heavy_modules']) or '无'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import sys
+sys.dont_write_bytecode = True
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+DEFAULT_JOB_WORKERS = 2  # 后台线程数
+
+
+class JobCancelled(Exception):
+    """任务被用户取消"""
+
+
+class Job:
+    """提交给AnalysisJobManager的后台任务
+
+    任务函数的第一个参数是Job本身，可以调用report()报告进度；
+    report()和check()在任务被取消后会抛出JobCancelled，使任务尽快在下一个阶段边界结束。
+    """
+
+    def __init__(self, key, dispatch, on_progress=None):
+        self.key = key
+        self.future = None
+        self._dispatch = dispatch
+        self._on_progress = on_progress
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """请求取消任务：尚未开始的任务直接移出队列，正在执行的任务在下一个阶段边界停止"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, stage):
+        """报告当前进度，回调通过dispatch在界面线程中执行"""
+        self.check()
+        if self._on_progress is not None:
+            self._dispatch(self._on_progress, stage)
+
+
+class AnalysisJobManager:
+    """界面使用的后台任务调度器
+
+    - 使用固定大小的线程池，不再为每次点击创建新线程
+    - 长期持有一个SteamGameAnalyzer，复用其连接池和缓存；API密钥、Steam ID或字体变化时才重新创建
+    - 键相同且尚未完成的任务会被合并，快速重复点击不会把同一份工作执行两次
+    - 使用分析器的任务共享分析器及其阶段计时器，因此按提交顺序依次执行
+    所有回调都通过dispatch（界面中为root.after）交给界面线程执行。
+    """
+
+    def __init__(self, dispatch, max_workers=DEFAULT_JOB_WORKERS):
+        self._dispatch = dispatch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._lock = threading.Lock()
+        self._jobs = {}  # 任务键 -> 尚未完成的Job
+        self._analyzer_lock = threading.Lock()
+        self._analyzer = None
+        self._analyzer_config = None
+
+    def submit(self, key, func, *args, on_progress=None, on_done=None, on_error=None, on_cancel=None,
+               uses_analyzer=True):
+        """提交任务func(job, *args)，返回Job；已有相同键的任务在排队或执行时直接返回该任务"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled:
+                return job
+            job = Job(key, self._dispatch, on_progress)
+            job.future = self._executor.submit(self._run, job, func, args, uses_analyzer)
+            self._jobs[key] = job
+        job.future.add_done_callback(lambda future: self._finish(job, future, on_done, on_error, on_cancel))
+        return job
+
+    def _run(self, job, func, args, uses_analyzer):
+        job.check()
+        if not uses_analyzer:
+            return func(job, *args)
+        with self._analyzer_lock:
+            job.check()
+            try:
+                return func(job, *args)
+            finally:
+                if self._analyzer is not None and self._analyzer.timer:
+                    self._analyzer.timer.listener = None
+
+    def _finish(self, job, future, on_done, on_error, on_cancel):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+        try:
+            result = future.result()
+        except (JobCancelled, CancelledError):
+            if on_cancel is not None:
+                self._dispatch(on_cancel)
+        except Exception as e:
+            if on_error is not None:
+                self._dispatch(on_error, str(e))
+        else:
+            if on_done is not None:
+                self._dispatch(on_done, result)
+
+    def analyzer_for(self, job, api_key, steam_id, **kwargs):
+        """在任务中获取共享的分析器，并把它的阶段计时器接到job的进度报告上
+
+        只能在uses_analyzer=True的任务内部调用。
+        """
+        config = (api_key, steam_id, tuple(sorted(kwargs.items())))
+        if self._analyzer is None or self._analyzer_config != config:
+            # 延迟导入：pandas/matplotlib等较重的依赖只在第一次执行任务时加载
+            from steam_game_analyzer import SteamGameAnalyzer
+            if self._analyzer is not None:
+                self._analyzer.close()
+            self._analyzer = SteamGameAnalyzer(api_key, steam_id, **kwargs)
+            self._analyzer_config = config
+        if self._analyzer.timer:
+            self._analyzer.timer.reset()
+            self._analyzer.timer.listener = job.report
+        return self._analyzer
+
+    def cancel_all(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+
+    @property
+    def busy(self):
+        with self._lock:
+            return bool(self._jobs)
+
+    def shutdown(self):
+        """取消所有任务并释放线程池和分析器"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._analyzer is not None:
+            self._analyzer.close()
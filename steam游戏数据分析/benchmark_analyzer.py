@@ -0,0 +1,223 @@
+"""使用模拟游戏库测量分析流程各阶段的性能
+
+在本地启动一个模拟Steam Web API的HTTP服务，无需API密钥即可对
+获取数据(fetch)、构建表格(build)、生成图表(charts)和完整分析(run)等阶段
+分别计时并测量峰值内存，结果以JSON格式输出，便于对比不同版本的性能。
+
+用法: python benchmark_analyzer.py [--sizes 100 1000 10000 100000] [--stages fetch build charts run]
+                                   [--profile preview] [--output result.json]
+"""
+import sys
+sys.dont_write_bytecode = True
+
+import io
+import os
+import json
+import time
+import random
+import warnings
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from steam_game_analyzer import SteamGameAnalyzer, build_games_frame
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+ALL_STAGES = ['fetch', 'build', 'charts', 'run', 'ingest']
+DEFAULT_STAGES = ['fetch', 'build', 'charts', 'run']
+
+
+def make_owned_games(count, seed=0):
+    """生成模拟的GetOwnedGames游戏列表，游玩时长呈长尾分布：约三分之一未游玩，少数游戏时长极高"""
+    rng = random.Random(seed)
+    games = []
+    for i in range(count):
+        appid = 10 * (i + 1)
+        if rng.random() < 0.35:
+            playtime = 0
+        else:
+            playtime = min(int(rng.lognormvariate(5.5, 1.8)), 500000)
+        games.append({'appid': appid, 'name': f"Synthetic Game {appid}", 'playtime_forever': playtime,
+                      'img_icon_url': 'a' * 40, 'has_community_visible_stats': True})
+    return games
+
+
+class FakeSteamAPI:
+    """本地模拟的Steam Web API，steamid即为游戏库大小，返回预先生成好的响应"""
+
+    def __init__(self, sizes, seed=0):
+        self.payloads = {}
+        for size in sizes:
+            games = make_owned_games(size, seed)
+            body = {'response': {'game_count': len(games), 'games': games}}
+            self.payloads[str(size)] = json.dumps(body).encode('utf-8')
+        self._server = None
+
+    def start(self):
+        """在后台线程中启动服务，返回base_url"""
+        payloads = self.payloads
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.startswith('/IPlayerService/GetOwnedGames'):
+                    body = payloads.get(query.get('steamid', [''])[0])
+                elif url.path.startswith('/ISteamUser/GetPlayerSummaries'):
+                    player = {'steamid': query.get('steamids', [''])[0], 'personaname': 'benchmark'}
+                    body = json.dumps({'response': {'players': [player]}}).encode('utf-8')
+                else:
+                    body = None
+
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _legacy_games_frame(games):
+    """旧版display_games_table的构建流程（两次校验、从字典列表构建、多次拷贝），用于对比"""
+    validated = [game for game in games if 'appid' in game and 'name' in game and 'playtime_forever' in game]
+    validated = [game for game in validated if 'name' in game and 'playtime_forever' in game]
+    df = pd.DataFrame(validated)
+    df = df[['name', 'playtime_forever']]
+    df.columns = ['游戏名称', '游玩时长(分钟)']
+    df['游玩时长(小时)'] = df['游玩时长(分钟)'] / 60
+    df['游玩时长'] = df['游玩时长(分钟)'].apply(lambda minutes: f"{minutes / 60:.1f}小时")
+    df['是否游玩'] = df['游玩时长(分钟)'] > 0
+    df = df.sort_values('游玩时长(小时)', ascending=False)
+    return df.reset_index(drop=True)
+
+
+def measure(func, *args, track_memory=True):
+    """执行func，返回(结果, 耗时秒数, 峰值内存字节数)
+
+    tracemalloc会明显拖慢执行速度，因此计时和内存测量分两次执行。
+    分析器打印到标准输出的内容会被丢弃，避免终端输出影响计时。
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if track_memory:
+            tracemalloc.start()
+            try:
+                func(*args)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def make_analyzer(base_url, size):
+    """创建指向模拟API的分析器，关闭所有缓存和历史记录，确保每次都完整执行"""
+    analyzer = SteamGameAnalyzer('benchmark', str(size), cache=False, chart_cache=False, history=False)
+    analyzer.base_url = base_url
+    return analyzer
+
+
+def run_benchmarks(sizes, stages, profile='preview', seed=0, track_memory=True):
+    """依次对每个游戏库大小执行所选阶段，返回结果列表"""
+    api = FakeSteamAPI(sizes, seed)
+    base_url = api.start()
+    results = []
+
+    def record(stage, size, elapsed, peak, **extra):
+        entry = {'stage': stage, 'games': size, 'seconds': round(elapsed, 4), 'peak_bytes': peak}
+        entry.update(extra)
+        results.append(entry)
+        print(f"{stage:>7} {size:>8} 款游戏: {elapsed:.3f}秒", file=sys.stderr)
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir, contextlib.chdir(workdir):
+            for size in sizes:
+                analyzer = make_analyzer(base_url, size)
+                games, elapsed, peak = measure(analyzer.get_owned_games, track_memory=track_memory)
+                if 'fetch' in stages:
+                    record('fetch', size, elapsed, peak, payload_bytes=len(api.payloads[str(size)]))
+
+                df, elapsed, peak = measure(analyzer.display_games_table, games, track_memory=track_memory)
+                if 'build' in stages:
+                    record('build', size, elapsed, peak, frame_bytes=int(df.memory_usage(deep=True).sum()))
+
+                if 'ingest' in stages:
+                    for impl, builder in (('build_games_frame', build_games_frame), ('legacy', _legacy_games_frame)):
+                        _, elapsed, peak = measure(builder, games, track_memory=track_memory)
+                        record('ingest', size, elapsed, peak, impl=impl)
+
+                if 'charts' in stages:
+                    _, elapsed, peak = measure(analyzer.generate_charts, df.copy(), profile,
+                                               track_memory=track_memory)
+                    record('charts', size, elapsed, peak, profile=profile)
+
+                if 'run' in stages:
+                    _, elapsed, peak = measure(analyzer.run_analysis, False, profile, track_memory=track_memory)
+                    record('run', size, elapsed, peak, profile=profile)
+                analyzer.close()
+    finally:
+        api.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="使用模拟游戏库测量分析流程各阶段的性能")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="模拟游戏库的游戏数量")
+    parser.add_argument('--stages', nargs='+', choices=ALL_STAGES, default=DEFAULT_STAGES, help="要测量的阶段")
+    parser.add_argument('--profile', default='preview', help="生成图表时使用的渲染配置")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--no-memory', action='store_true', help="不测量峰值内存（每个阶段只执行一次）")
+    parser.add_argument('--output', help="将结果以JSON格式写入该文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    # 缺少中文字体时matplotlib会为每个字形发出警告，不影响测量结果
+    warnings.filterwarnings('ignore', message='Glyph .* missing from font')
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'parameters': {'sizes': args.sizes, 'stages': args.stages, 'profile': args.profile, 'seed': args.seed},
+        'results': run_benchmarks(args.sizes, args.stages, args.profile, args.seed, not args.no_memory),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
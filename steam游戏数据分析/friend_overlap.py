@@ -0,0 +1,201 @@
+import sys
+sys.dont_write_bytecode = True
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from steam_game_analyzer import SteamGameAnalyzer
+from steam_batch_analyzer import (iter_batch_owned_games, load_default_api_key, DEFAULT_WORKERS, DEFAULT_RATE,
+                                  DEFAULT_BURST)
+
+DEFAULT_TOP_SHARED = 20  # 默认列出的共同拥有最多的游戏数量
+
+
+class LibraryIndex:
+    """多个账号游戏库的appid -> 拥有者倒排索引
+
+    每个账号对应一个二进制位，每款游戏保存一个拥有者位掩码：
+    查询某款游戏的拥有者、几个人共同拥有的游戏、只有某人拥有的游戏都只需要一次位运算，
+    不必在各个游戏库之间两两求交集，几十个账号、每人几千款游戏时依然很快。
+    """
+
+    def __init__(self):
+        self.owners = []  # 按加入顺序排列的steam_id
+        self._bits = {}  # steam_id -> 位掩码
+        self._index = {}  # appid -> 拥有者位掩码
+        self._minutes = {}  # appid -> 所有拥有者的游玩时长之和(分钟)
+        self.names = {}  # appid -> 游戏名称
+
+    @classmethod
+    def from_libraries(cls, libraries):
+        """libraries为{steam_id: GetOwnedGames的游戏列表}"""
+        index = cls()
+        for steam_id, games in libraries.items():
+            index.add_library(steam_id, games)
+        return index
+
+    def add_library(self, steam_id, games):
+        """加入一个账号的游戏库，缺少appid的条目会被跳过"""
+        if steam_id in self._bits:
+            raise ValueError(f"已经加入过该账号的游戏库: {steam_id}")
+        bit = 1 << len(self.owners)
+        self.owners.append(steam_id)
+        self._bits[steam_id] = bit
+
+        index, minutes, names = self._index, self._minutes, self.names
+        for game in games:
+            appid = game.get('appid')
+            if appid is None:
+                continue
+            index[appid] = index.get(appid, 0) | bit
+            minutes[appid] = minutes.get(appid, 0) + game.get('playtime_forever', 0)
+            if 'name' in game:
+                names.setdefault(appid, game['name'])
+
+    def __len__(self):
+        return len(self._index)
+
+    def _mask(self, steam_ids):
+        try:
+            mask = 0
+            for steam_id in steam_ids:
+                mask |= self._bits[steam_id]
+            return mask
+        except KeyError as e:
+            raise KeyError(f"索引中没有该账号的游戏库: {e.args[0]}") from None
+
+    def owners_of(self, appid):
+        """拥有该游戏的账号列表"""
+        mask = self._index.get(appid, 0)
+        return [steam_id for steam_id in self.owners if mask & self._bits[steam_id]]
+
+    def library(self, steam_id):
+        """某个账号拥有的appid列表"""
+        bit = self._mask([steam_id])
+        return [appid for appid, mask in self._index.items() if mask & bit]
+
+    def shared(self, steam_ids=None):
+        """steam_ids中所有账号都拥有的appid列表，默认为索引中的全部账号"""
+        mask = self._mask(self.owners if steam_ids is None else steam_ids)
+        if not mask:
+            return []
+        return [appid for appid, owners in self._index.items() if owners & mask == mask]
+
+    def unique_to(self, steam_id, among=None):
+        """只有steam_id拥有、among中其他账号都没有的appid列表，among默认为索引中的全部账号"""
+        bit = self._mask([steam_id])
+        others = self._mask(self.owners if among is None else among) & ~bit
+        return [appid for appid, owners in self._index.items() if owners & bit and not owners & others]
+
+    def most_shared(self, n=DEFAULT_TOP_SHARED, min_owners=2):
+        """拥有人数最多的前n款游戏，返回DataFrame；人数相同时按所有拥有者的总游玩时长排序"""
+        appids = np.fromiter(self._index.keys(), dtype=np.int64, count=len(self._index))
+        counts = np.fromiter((mask.bit_count() for mask in self._index.values()), dtype=np.int64,
+                             count=len(self._index))
+        minutes = np.fromiter((self._minutes[appid] for appid in self._index), dtype=np.int64,
+                              count=len(self._index))
+        keep = counts >= min_owners
+        appids, counts, minutes = appids[keep], counts[keep], minutes[keep]
+        order = np.lexsort((-minutes, -counts))[:n]
+        appids = appids[order]
+        return pd.DataFrame({
+            'appid': appids,
+            '游戏名称': [self.names.get(appid, str(appid)) for appid in appids.tolist()],
+            '拥有人数': counts[order],
+            '拥有比例': counts[order] / max(len(self.owners), 1),
+            '总游玩时长(小时)': minutes[order] / 60,
+        })
+
+    def overlap_matrix(self):
+        """账号两两之间共同拥有的游戏数量，对角线为各自的游戏数量"""
+        owner_count = len(self.owners)
+        matrix = np.zeros((len(self._index), owner_count), dtype=np.float32)
+        masks = list(self._index.values())
+        # 位掩码按每64位一段转为uint64数组，再展开成"游戏 x 账号"的0/1矩阵，用一次矩阵乘法得到所有两两交集
+        for start in range(0, owner_count, 64):
+            width = min(64, owner_count - start)
+            words = np.fromiter(((mask >> start) & 0xFFFFFFFFFFFFFFFF for mask in masks), dtype=np.uint64,
+                                count=len(masks))
+            shifts = np.arange(width, dtype=np.uint64)
+            matrix[:, start:start + width] = (words[:, None] >> shifts) & np.uint64(1)
+        counts = (matrix.T @ matrix).round().astype(np.int64)
+        return pd.DataFrame(counts, index=self.owners, columns=self.owners)
+
+
+def build_friends_index(analyzer, friend_ids=None, max_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                        burst=DEFAULT_BURST, force_refresh=False):
+    """获取分析器对应账号及其好友的游戏库，返回(LibraryIndex, {获取失败的steam_id: 错误信息})
+
+    friend_ids默认通过好友列表接口获取。好友的游戏库并发获取，并与分析器共享响应缓存，
+    短时间内重复分析不会再次请求；好友的游玩时长不写入历史快照库。
+    游戏库不公开的好友没有游戏数据，不会加入索引。
+    """
+    own_games = analyzer.get_owned_games(force_refresh)
+    if friend_ids is None:
+        friend_ids = analyzer.get_friend_list(force_refresh)
+    friend_ids = [steam_id for steam_id in friend_ids if steam_id != analyzer.steam_id]
+
+    index = LibraryIndex()
+    index.add_library(analyzer.steam_id, own_games)
+    failed = {}
+    results = iter_batch_owned_games(analyzer.api_key, friend_ids, max_workers=max_workers, rate=rate, burst=burst,
+                                     force_refresh=force_refresh, cache=analyzer.cache, history=False,
+                                     base_url=analyzer.base_url)
+    libraries = {}
+    for result in results:
+        if not result.ok:
+            failed[result.steam_id] = result.error
+        elif result.games:
+            libraries[result.steam_id] = result.games
+    # 按好友列表的顺序加入，结果不受完成顺序影响
+    for steam_id in friend_ids:
+        if steam_id in libraries:
+            index.add_library(steam_id, libraries[steam_id])
+    return index, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分析好友之间共同拥有的游戏")
+    parser.add_argument('--steam-id', required=True, help="自己的Steam ID")
+    parser.add_argument('--api-key', default=None, help="Steam API密钥，默认读取config.json")
+    parser.add_argument('--friends', nargs='+', help="只分析这些好友，默认使用完整的好友列表")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_SHARED, help="列出共同拥有最多的游戏数量")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="并发线程数")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="全局请求速率上限(次/秒)")
+    parser.add_argument('--force-refresh', action='store_true', help="忽略本地缓存，重新请求API")
+    args = parser.parse_args(argv)
+
+    api_key = args.api_key or load_default_api_key()
+    if not api_key:
+        parser.error("请通过--api-key提供API密钥，或先在界面中保存配置")
+
+    analyzer = SteamGameAnalyzer(api_key, args.steam_id)
+    try:
+        index, failed = build_friends_index(analyzer, args.friends, args.workers, args.rate,
+                                            force_refresh=args.force_refresh)
+    finally:
+        analyzer.close()
+
+    for steam_id, error in failed.items():
+        print(f"{steam_id}: 获取失败 - {error}")
+    friends = len(index.owners) - 1
+    if not friends:
+        print("没有可以比较的好友游戏库（好友列表或游戏库可能不公开）")
+        return 1
+
+    print(f"共 {friends} 位好友、{len(index)} 款不同的游戏")
+    print(f"\n共同拥有最多的{args.top}款游戏:")
+    shared = index.most_shared(args.top)
+    if shared.empty:
+        print("  没有两人以上共同拥有的游戏")
+    for row in shared.itertuples(index=False):
+        print(f"  {row.游戏名称} - {row.拥有人数}人 ({row.拥有比例:.0%})")
+    print(f"\n所有人都拥有的游戏: {len(index.shared())} 款")
+    print(f"只有自己拥有的游戏: {len(index.unique_to(args.steam_id))} 款")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
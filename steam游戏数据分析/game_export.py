@@ -0,0 +1,171 @@
+import sys
+sys.dont_write_bytecode = True
+
+import os
+import time
+import uuid
+import tempfile
+
+import pandas as pd
+
+# 支持的导出格式：CSV、JSON Lines和列式存储的Parquet（需要安装pyarrow）
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+EXPORT_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet', '.pq': 'parquet'}
+EXPORT_CHUNK_SIZE = 10000  # 每次写入的行数，Parquet中每块对应一个行组
+
+# 导出数据使用固定的英文列名和类型，多个账号、多次运行写入同一数据集时结构保持一致
+EXPORT_COLUMNS = ['steam_id', 'appid', 'name', 'playtime_forever', 'playtime_hours', 'played', 'exported_at']
+
+
+def guess_export_format(path):
+    """根据文件扩展名判断导出格式"""
+    fmt = EXPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"无法根据文件名判断导出格式: {path}，可选: {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+def games_export_frame(df, steam_id, exported_at=None):
+    """把build_games_frame构建的游戏表格转换为导出用的DataFrame，不修改df"""
+    count = len(df)
+    return pd.DataFrame({
+        'steam_id': pd.Series([str(steam_id)] * count, dtype='string'),
+        'appid': df['appid'].to_numpy(dtype='int64'),
+        'name': pd.Series(df['游戏名称'].to_numpy(), dtype='string'),
+        'playtime_forever': df['游玩时长(分钟)'].to_numpy(dtype='int64'),
+        'playtime_hours': df['游玩时长(小时)'].to_numpy(dtype='float64'),
+        'played': df['是否游玩'].to_numpy(dtype=bool),
+        'exported_at': int(exported_at if exported_at is not None else time.time()),
+    }, columns=EXPORT_COLUMNS)
+
+
+def _parquet_schema(pa):
+    return pa.schema([
+        ('steam_id', pa.string()),
+        ('appid', pa.int64()),
+        ('name', pa.string()),
+        ('playtime_forever', pa.int64()),
+        ('playtime_hours', pa.float64()),
+        ('played', pa.bool_()),
+        ('exported_at', pa.int64()),
+    ])
+
+
+class GameDataExporter:
+    """逐块写入游戏数据的导出器，不会在内存中拼出完整的输出内容
+
+    用法: with GameDataExporter('games.parquet') as exporter: exporter.write(frame)
+    可以多次调用write()，批量任务中每个账号写入一次，全部写入同一个数据集。
+
+    - append为False时先写入同目录的临时文件，close()时再替换目标文件，中途失败不会留下半截文件
+    - append为True时CSV和JSON Lines追加到已有文件末尾（CSV只在文件为空时写表头）；
+      Parquet文件无法追加，此时path视为数据集目录，每次运行在其中写入一个新的part文件，
+      可以用pandas.read_parquet(path)一次读取整个目录
+    """
+
+    def __init__(self, path, fmt=None, append=False, chunk_size=EXPORT_CHUNK_SIZE):
+        fmt = fmt or guess_export_format(path)
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"未知的导出格式: {fmt}，可选: {', '.join(EXPORT_FORMATS)}")
+        self.path = path
+        self.fmt = fmt
+        self.append = append
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._file = None
+        self._parquet_writer = None
+        self._parquet_schema = None
+        self._tmp_path = None
+        self._target = None
+        self._header = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _open(self):
+        if self.fmt == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("导出Parquet格式需要安装pyarrow: pip install pyarrow") from None
+            if self.append:
+                os.makedirs(self.path, exist_ok=True)
+                directory = self.path
+                part = f"part-{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+                self._target = os.path.join(directory, part)
+            else:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                self._target = self.path
+            fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.parquet')
+            os.close(fd)
+            self._parquet_schema = _parquet_schema(pa)
+            self._parquet_writer = pq.ParquetWriter(self._tmp_path, self._parquet_schema)
+            return
+
+        if self.append:
+            self._target = self.path
+            self._file = open(self.path, 'a', encoding='utf-8', newline='')
+            self._header = self._file.tell() == 0
+        else:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix=f".{self.fmt}")
+            self._target = self.path
+            self._file = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+
+    def write(self, frame):
+        """按chunk_size分块写入frame（列应与EXPORT_COLUMNS一致），返回写入的行数"""
+        if self._file is None and self._parquet_writer is None:
+            self._open()
+        for start in range(0, len(frame), self.chunk_size):
+            self._write_chunk(frame.iloc[start:start + self.chunk_size])
+        self.rows_written += len(frame)
+        return len(frame)
+
+    def _write_chunk(self, chunk):
+        if self.fmt == 'csv':
+            chunk.to_csv(self._file, header=self._header, index=False)
+            self._header = False
+        elif self.fmt == 'jsonl':
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            self._file.write(text if text.endswith('\n') else text + '\n')
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(chunk, schema=self._parquet_schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+
+    def close(self):
+        """完成写入；没有写入任何数据时不会创建或替换目标文件"""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self._target)
+            self._tmp_path = None
+
+    def abort(self):
+        """放弃写入并删除临时文件；追加模式下已写入的内容会保留"""
+        try:
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+            elif self._file is not None:
+                self._file.close()
+        finally:
+            self._parquet_writer = None
+            self._file = None
+            if self._tmp_path is not None:
+                try:
+                    os.remove(self._tmp_path)
+                except OSError:
+                    pass
+                self._tmp_path = None
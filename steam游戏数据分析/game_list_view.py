@@ -0,0 +1,147 @@
+import sys
+sys.dont_write_bytecode = True
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class GameListView(ttk.Frame):
+    """只创建可见行的游戏列表，适合显示上万款游戏
+
+    Treeview中始终只有一屏的行，滚动时复用这些行并替换显示的内容，不会为每款游戏创建控件。
+    点击列标题按该列排序，再次点击反向排序；排序只重排行索引，不会重建控件。
+    """
+
+    ROW_HEIGHT = 22
+    HEADING_HEIGHT = 26
+
+    def __init__(self, parent, columns, **kwargs):
+        """columns为[(列键, 标题, 宽度, 对齐方式), ...]，第一列会随窗口宽度拉伸"""
+        super().__init__(parent, **kwargs)
+        self.columns = columns
+        self._rows = []  # 每行的显示值
+        self._sort_keys = {}  # 列键 -> 每行的排序值
+        self._ascending_orders = {}  # 已计算过的升序行索引，反向排序直接倒序复用
+        self._order = []
+        self._sort_column = None
+        self._descending = False
+        self._offset = 0
+        self._visible = 0
+
+        style = ttk.Style(self)
+        style.configure('GameList.Treeview', rowheight=self.ROW_HEIGHT)
+
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in columns], show='headings',
+                                 style='GameList.Treeview', selectmode='none', height=1)
+        for index, (key, title, width, anchor) in enumerate(columns):
+            self.tree.heading(key, text=title, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor=anchor, stretch=index == 0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._on_wheel)
+        for sequence, step in (('<Prior>', -1), ('<Next>', 1)):
+            self.tree.bind(sequence, lambda event, s=step: self.scroll(s * self._visible))
+
+    def set_data(self, rows, sort_keys=None):
+        """设置列表内容：rows为每行的显示值，sort_keys为{列键: 每行的排序值列表}，没有提供的列按显示值排序"""
+        self._rows = rows
+        self._sort_keys = sort_keys or {}
+        self._ascending_orders = {}
+        self._order = list(range(len(rows)))
+        self._sort_column = None
+        self._descending = False
+        self._offset = 0
+        self._update_headings()
+        self._render()
+
+    def clear(self):
+        self.set_data([])
+
+    def sort_by(self, key):
+        """按指定列排序：文字列首次点击为升序，数值列首次点击为降序，再次点击同一列反向排序"""
+        if not self._rows:
+            return
+        values = self._sort_keys.get(key)
+        if values is None:
+            index = [column[0] for column in self.columns].index(key)
+            values = [row[index] for row in self._rows]
+
+        if key == self._sort_column:
+            self._descending = not self._descending
+        else:
+            self._sort_column = key
+            self._descending = not isinstance(values[0], str)
+
+        ascending = self._ascending_orders.get(key)
+        if ascending is None:
+            ascending = sorted(range(len(values)), key=values.__getitem__)
+            self._ascending_orders[key] = ascending
+        self._order = ascending[::-1] if self._descending else ascending
+        self._offset = 0
+        self._update_headings()
+        self._render()
+
+    def scroll(self, rows):
+        """向下滚动rows行（负数为向上）"""
+        self._set_offset(self._offset + rows)
+
+    def _set_offset(self, offset):
+        offset = max(0, min(int(offset), len(self._order) - self._visible))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _update_headings(self):
+        for key, title, _, _ in self.columns:
+            if key == self._sort_column:
+                title += ' ▼' if self._descending else ' ▲'
+            self.tree.heading(key, text=title)
+
+    def _render(self):
+        """只把当前可见范围内的行写入Treeview"""
+        total = len(self._order)
+        self._offset = max(0, min(self._offset, total - self._visible))
+        count = min(self._visible, total)
+
+        items = self.tree.get_children()
+        if len(items) > count:
+            self.tree.delete(*items[count:])
+        for slot in range(len(items), count):
+            self.tree.insert('', 'end', iid=str(slot))
+        for slot in range(count):
+            self.tree.item(str(slot), values=self._rows[self._order[self._offset + slot]])
+
+        if total:
+            self.scrollbar.set(self._offset / total, (self._offset + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_resize(self, event):
+        visible = max(1, (event.height - self.HEADING_HEIGHT) // self.ROW_HEIGHT)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self._set_offset(float(value) * len(self._order))
+        elif action == 'scroll':
+            step = self._visible if unit == 'pages' else 1
+            self.scroll(int(value) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            self.scroll(-3)
+        elif event.num == 5:
+            self.scroll(3)
+        elif event.delta:
+            # Windows上每格为120，macOS上为较小的整数
+            self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
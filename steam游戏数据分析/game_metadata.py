@@ -0,0 +1,134 @@
+import sys
+sys.dont_write_bytecode = True
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# 游戏元数据缓存与响应缓存放在同一个目录下
+DEFAULT_METADATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".steam_cache", "game_metadata.db")
+
+DETAILS_TTL = 30 * 86400  # 类型、发行日期等商店信息很少变化
+PRICE_TTL = 86400  # 价格可能随促销变化
+ACHIEVEMENTS_TTL = 7 * 86400  # 游玩时长未变化时成就也不会变化，TTL只作为兜底
+
+SCHEMA = """
+-- 商店信息，data为NULL表示商店中没有该游戏（已下架等），同样缓存以免反复请求
+CREATE TABLE IF NOT EXISTS app_details (
+    appid INTEGER PRIMARY KEY,
+    fetched_at INTEGER NOT NULL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS app_prices (
+    appid INTEGER PRIMARY KEY,
+    fetched_at INTEGER NOT NULL,
+    data TEXT
+);
+-- 成就完成情况与获取时的游玩时长一起保存，时长变化后才需要重新获取；total为NULL表示该游戏没有成就统计
+CREATE TABLE IF NOT EXISTS achievements (
+    steam_id TEXT NOT NULL,
+    appid INTEGER NOT NULL,
+    playtime_forever INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    total INTEGER,
+    unlocked INTEGER,
+    PRIMARY KEY (steam_id, appid)
+) WITHOUT ROWID;
+"""
+
+QUERY_CHUNK_SIZE = 500  # 每条IN查询最多包含的appid数量
+
+
+class GameMetadataStore:
+    """按appid缓存游戏元数据的SQLite库，每类数据有各自的有效期
+
+    读取时只返回未过期的条目，调用方只需为缺失的appid发出请求。
+    """
+
+    def __init__(self, path=DEFAULT_METADATA_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """打开一个独立连接并在事务中执行，可安全地在多个线程中共享同一个GameMetadataStore"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_json(self, table, appids, ttl):
+        since = int(time.time() - ttl)
+        appids = list(appids)
+        result = {}
+        with self._connect() as conn:
+            for start in range(0, len(appids), QUERY_CHUNK_SIZE):
+                chunk = appids[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT appid, data FROM {table} WHERE fetched_at >= ? AND appid IN ({placeholders})",
+                    [since] + chunk)
+                for appid, data in rows:
+                    result[appid] = json.loads(data) if data is not None else None
+        return result
+
+    def _put_json(self, table, items):
+        now = int(time.time())
+        rows = [(appid, now, json.dumps(data, ensure_ascii=False) if data is not None else None)
+                for appid, data in items.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany(f"INSERT OR REPLACE INTO {table} (appid, fetched_at, data) VALUES (?, ?, ?)", rows)
+
+    def get_details(self, appids, ttl=DETAILS_TTL):
+        """返回{appid: 商店信息或None}，只包含未过期的条目"""
+        return self._get_json('app_details', appids, ttl)
+
+    def put_details(self, details):
+        self._put_json('app_details', details)
+
+    def get_prices(self, appids, ttl=PRICE_TTL):
+        """返回{appid: 价格信息或None}，只包含未过期的条目"""
+        return self._get_json('app_prices', appids, ttl)
+
+    def put_prices(self, prices):
+        self._put_json('app_prices', prices)
+
+    def get_achievements(self, steam_id, playtimes, ttl=ACHIEVEMENTS_TTL):
+        """playtimes为{appid: 当前游玩时长}，返回{appid: (成就总数, 已解锁数)}
+
+        只返回游玩时长与获取时一致且未过期的条目。
+        """
+        since = int(time.time() - ttl)
+        appids = list(playtimes)
+        result = {}
+        with self._connect() as conn:
+            for start in range(0, len(appids), QUERY_CHUNK_SIZE):
+                chunk = appids[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    "SELECT appid, playtime_forever, total, unlocked FROM achievements "
+                    f"WHERE steam_id = ? AND fetched_at >= ? AND appid IN ({placeholders})",
+                    [steam_id, since] + chunk)
+                for appid, playtime, total, unlocked in rows:
+                    if playtimes[appid] == playtime:
+                        result[appid] = (total, unlocked)
+        return result
+
+    def put_achievements(self, steam_id, achievements):
+        """achievements为{appid: (游玩时长, 成就总数, 已解锁数)}"""
+        now = int(time.time())
+        rows = [(steam_id, appid, playtime, now, total, unlocked)
+                for appid, (playtime, total, unlocked) in achievements.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO achievements (steam_id, appid, playtime_forever, fetched_at, total, unlocked) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
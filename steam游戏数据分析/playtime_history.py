@@ -0,0 +1,161 @@
+import sys
+sys.dont_write_bytecode = True
+
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+
+# 历史快照数据库默认保存在项目目录下
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "playtime_history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    appid INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+-- 每款游戏的游玩时长快照，只在playtime_forever变化时写入
+CREATE TABLE IF NOT EXISTS snapshots (
+    steam_id TEXT NOT NULL,
+    appid INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    playtime_forever INTEGER NOT NULL,
+    PRIMARY KEY (steam_id, appid, fetched_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshots_time ON snapshots (steam_id, fetched_at);
+-- 每个账号每款游戏最近一次记录的时长，用于增量比较
+CREATE TABLE IF NOT EXISTS latest (
+    steam_id TEXT NOT NULL,
+    appid INTEGER NOT NULL,
+    playtime_forever INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    PRIMARY KEY (steam_id, appid)
+) WITHOUT ROWID;
+"""
+
+WEEKLY_GAIN_SQL = """
+SELECT s.appid AS appid, g.name AS name, s.week AS week, SUM(s.delta) / 60.0 AS hours_gained
+FROM (
+    SELECT appid, fetched_at,
+           strftime('%Y-W%W', fetched_at, 'unixepoch', 'localtime') AS week,
+           playtime_forever - LAG(playtime_forever) OVER (PARTITION BY appid ORDER BY fetched_at) AS delta
+    FROM snapshots
+    WHERE steam_id = ?
+) s
+LEFT JOIN games g ON g.appid = s.appid
+WHERE s.delta IS NOT NULL AND s.fetched_at >= ?
+GROUP BY s.appid, s.week
+ORDER BY s.week, hours_gained DESC
+"""
+
+
+class PlaytimeHistory:
+    """基于SQLite的游玩时长历史快照库
+
+    每次获取游戏列表后调用ingest()增量写入：只记录playtime_forever发生变化的游戏，
+    未变化的游戏不会产生新行。之后可以直接从索引中查询每周新增时长等统计，无需重新请求API。
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """打开一个独立连接并在事务中执行，可安全地在多个线程中共享同一个PlaytimeHistory"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ingest(self, steam_id, games, fetched_at=None):
+        """写入一次获取结果，返回本次实际记录的(时长发生变化的)游戏数量"""
+        fetched_at = int(fetched_at if fetched_at is not None else time.time())
+        with self._lock, self._connect() as conn:
+            previous = dict(conn.execute(
+                "SELECT appid, playtime_forever FROM latest WHERE steam_id = ?", (steam_id,)))
+
+            changed = []
+            names = []
+            for game in games:
+                appid = game.get('appid')
+                playtime = game.get('playtime_forever')
+                if appid is None or playtime is None:
+                    continue
+                if previous.get(appid) != playtime:
+                    changed.append((steam_id, appid, fetched_at, playtime))
+                    if game.get('name'):
+                        names.append((appid, game['name']))
+
+            if changed:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO snapshots (steam_id, appid, fetched_at, playtime_forever) VALUES (?, ?, ?, ?)",
+                    changed)
+                conn.executemany(
+                    "INSERT INTO latest (steam_id, appid, fetched_at, playtime_forever) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (steam_id, appid) DO UPDATE SET "
+                    "playtime_forever = excluded.playtime_forever, fetched_at = excluded.fetched_at",
+                    changed)
+                conn.executemany(
+                    "INSERT INTO games (appid, name) VALUES (?, ?) "
+                    "ON CONFLICT (appid) DO UPDATE SET name = excluded.name WHERE name != excluded.name",
+                    names)
+            return len(changed)
+
+    def weekly_hours_gained(self, steam_id, since=None):
+        """按周统计每款游戏新增的游玩时长(小时)，since为起始时间戳，默认统计全部历史
+
+        每款游戏的第一条快照只作为基线，不计入新增时长。
+        """
+        import pandas as pd
+
+        with self._connect() as conn:
+            return pd.read_sql_query(WEEKLY_GAIN_SQL, conn, params=(steam_id, int(since or 0)))
+
+    def game_history(self, steam_id, appid):
+        """返回某款游戏的时长变化记录: [(时间戳, 累计分钟数), ...]"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT fetched_at, playtime_forever FROM snapshots "
+                "WHERE steam_id = ? AND appid = ? ORDER BY fetched_at",
+                (steam_id, appid)).fetchall()
+
+    def snapshot_count(self, steam_id):
+        """返回该账号已记录的快照行数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM snapshots WHERE steam_id = ?", (steam_id,)).fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询本地记录的每周游玩时长变化")
+    parser.add_argument('steam_id', help="Steam ID")
+    parser.add_argument('--weeks', type=int, default=4, help="统计最近几周，0表示全部历史")
+    parser.add_argument('--db', default=DEFAULT_HISTORY_PATH, help="历史数据库路径")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"历史数据库不存在: {args.db}")
+        return 1
+
+    since = time.time() - args.weeks * 7 * 86400 if args.weeks > 0 else None
+    report = PlaytimeHistory(args.db).weekly_hours_gained(args.steam_id, since)
+    if report.empty:
+        print("所选时间范围内没有游玩时长变化")
+        return 0
+
+    for week, group in report.groupby('week', sort=True):
+        print(f"\n{week} 共新增 {group['hours_gained'].sum():.1f} 小时:")
+        for row in group.itertuples(index=False):
+            print(f"  {row.name or row.appid}: +{row.hours_gained:.1f} 小时")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,12 @@ sys.dont_write_bytecode = True
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import threading
-from steam_game_analyzer import SteamGameAnalyzer
-import pandas as pd
 import json
 import os
 
+from game_list_view import GameListView
+from analysis_jobs import AnalysisJobManager
+
 # 设置样式
 try:
     from tkinter import font
@@ -23,6 +23,10 @@ class SteamAnalyzerUI:
         self.root.geometry("900x700")
         self.root.minsize(900, 700)
         
+        # 后台任务调度器：回调统一通过root.after回到界面线程执行
+        self.jobs = AnalysisJobManager(lambda callback, *args: self.root.after(0, callback, *args))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # 设置样式
         self.setup_styles()
         
@@ -98,32 +102,69 @@ class SteamAnalyzerUI:
         self.chart_button = ttk.Button(button_frame, text="生成分析图表", command=self.generate_charts, state="disabled", style='Accent.TButton')
         self.chart_button.pack(side="left", padx=10)
         
+        # 导出按钮：按所选渲染配置把完整分辨率的图表写入文件
+        self.export_button = ttk.Button(button_frame, text="导出图表", command=self.export_charts, state="disabled", style='Accent.TButton')
+        self.export_button.pack(side="left", padx=10)
+        
+        # 取消按钮：取消排队中和正在执行的后台任务
+        self.cancel_button = ttk.Button(button_frame, text="取消", command=self.cancel_jobs, state="disabled")
+        self.cancel_button.pack(side="left", padx=10)
+        
         # 保存配置按钮
         self.save_config_button = ttk.Button(button_frame, text="保存配置", command=self.save_config, style='Accent.TButton')
         self.save_config_button.pack(side="left", padx=10)
         
+        # 强制刷新选项：忽略本地缓存，重新请求Steam API
+        self.force_refresh_var = tk.BooleanVar(value=False)
+        force_refresh_check = ttk.Checkbutton(button_frame, text="强制刷新", variable=self.force_refresh_var)
+        force_refresh_check.pack(side="left", padx=10)
+        
+        # 导出图表的质量选择：窗口内预览固定使用preview配置，印刷/矢量格式用于导出
+        self.render_profile_var = tk.StringVar(value="standard")
+        profile_combo = ttk.Combobox(button_frame, textvariable=self.render_profile_var, state="readonly", width=10,
+                                     values=["preview", "standard", "print", "svg", "pdf"])
+        profile_combo.pack(side="left", padx=10)
+        
         # 结果显示区域
         result_label = ttk.Label(main_frame, text="游戏数据:", style='Section.TLabel')
         result_label.grid(row=3, column=0, sticky="w", pady=(0, 12))
         
-        # 创建带滚动条的文本框
-        text_frame = ttk.Frame(main_frame, style='Result.TFrame')
-        text_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 12))
+        # 后台任务进度
+        self.progress_var = tk.StringVar(value="")
+        progress_label = ttk.Label(main_frame, textvariable=self.progress_var)
+        progress_label.grid(row=3, column=1, sticky="e", pady=(0, 12))
+        
+        # 结果标签页：游戏列表和图表预览
+        self.result_notebook = ttk.Notebook(main_frame)
+        self.result_notebook.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 12))
         main_frame.rowconfigure(4, weight=1)
-        text_frame.rowconfigure(0, weight=1)
-        text_frame.columnconfigure(0, weight=1)
         
-        self.result_text = scrolledtext.ScrolledText(text_frame, width=90, height=20, wrap=tk.WORD, font=('微软雅黑', 10), bg='#ffffff', fg='#2c3e50', padx=10, pady=10)
-        self.result_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=2, pady=2)
+        # 游戏列表：只创建可见行，点击列标题排序
+        self.game_list = GameListView(self.result_notebook, columns=[
+            ('name', '游戏名称', 420, tk.W),
+            ('hours', '游玩时长', 140, tk.E),
+            ('status', '游玩状态', 140, tk.CENTER),
+        ], style='Result.TFrame')
+        self.result_notebook.add(self.game_list, text="游戏列表")
+        
+        # 图表预览：在内存中渲染并缩放到窗口大小，不写入文件
+        self.preview_label = ttk.Label(self.result_notebook, text="生成分析图表后在此预览", anchor=tk.CENTER)
+        self.result_notebook.add(self.preview_label, text="图表预览")
+        self.preview_image = None
+        
+        # 状态信息区域：显示获取进度、错误信息和各阶段耗时
+        text_frame = ttk.Frame(main_frame, style='Result.TFrame')
+        text_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 12))
+        text_frame.columnconfigure(0, weight=1)
         
-        # 添加垂直滚动条
-        v_scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.result_text.yview)
-        v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S), padx=(0, 2), pady=2)
-        self.result_text.configure(yscrollcommand=v_scrollbar.set)
+        self.result_text = scrolledtext.ScrolledText(text_frame, width=90, height=6, wrap=tk.WORD, font=('微软雅黑', 10), bg='#ffffff', fg='#2c3e50', padx=10, pady=10)
+        self.result_text.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=2, pady=2)
         
         # 数据存储
         self.games_data = None
         self.df = None
+        # 图表使用的中文字体文件，可在config.json中通过font_path指定
+        self.font_path = None
         
     def save_config(self):
         """保存API密钥和Steam ID到配置文件"""
@@ -137,8 +178,11 @@ class SteamAnalyzerUI:
         
         config = {
             "api_key": api_key,
-            "steam_id": steam_id
+            "steam_id": steam_id,
+            "render_profile": self.render_profile_var.get()
         }
+        if self.font_path:
+            config["font_path"] = self.font_path
         
         try:
             # 配置文件保存在项目根目录
@@ -163,6 +207,9 @@ class SteamAnalyzerUI:
                     self.api_key_entry.insert(0, config["api_key"])
                 if "steam_id" in config:
                     self.steam_id_entry.insert(0, config["steam_id"])
+                if "render_profile" in config:
+                    self.render_profile_var.set(config["render_profile"])
+                self.font_path = config.get("font_path") or None
         except Exception as e:
             # 如果加载配置失败，不影响程序正常运行
             print(f"加载配置时发生错误: {str(e)}")
@@ -178,26 +225,46 @@ class SteamAnalyzerUI:
         
         # 禁用按钮并显示加载状态
         self.fetch_button.config(state="disabled", text="获取中...")
+        self.cancel_button.config(state="normal")
         self.result_text.delete(1.0, tk.END)
         self.result_text.insert(tk.END, "正在获取游戏数据，请稍候...\n")
         
-        # 在新线程中执行数据获取
-        threading.Thread(target=self._fetch_data_thread, args=(api_key, steam_id), daemon=True).start()
-        
-    def _fetch_data_thread(self, api_key, steam_id):
-        """在后台线程中获取数据"""
-        try:
-            analyzer = SteamGameAnalyzer(api_key, steam_id)
-            games = analyzer.get_owned_games()
-            
-            # 在主线程中更新UI
-            self.root.after(0, self._update_ui_after_fetch, games)
-        except Exception as e:
-            self.root.after(0, self._handle_fetch_error, str(e))
+        # 交给后台任务调度器执行，相同参数的请求尚未完成时不会重复执行
+        force_refresh = self.force_refresh_var.get()
+        self.jobs.submit(('fetch', api_key, steam_id, force_refresh), self._fetch_data_job,
+                         api_key, steam_id, force_refresh,
+                         on_progress=self._update_progress, on_done=self._update_ui_after_fetch,
+                         on_error=self._handle_fetch_error, on_cancel=self._handle_job_cancelled)
+        
+    def _fetch_data_job(self, job, api_key, steam_id, force_refresh=False):
+        """在后台线程中获取数据并构建列表内容，界面线程只负责显示"""
+        analyzer = self.jobs.analyzer_for(job, api_key, steam_id, font_path=self.font_path)
+        with analyzer.timer.stage('获取游戏数据'):
+            games = analyzer.get_owned_games(force_refresh)
+        if not games:
+            return games, None, None, None
+        
+        with analyzer.timer.stage('解析数据'):
+            # 界面自己显示结果，不需要再把整张表格打印到标准输出
+            df = analyzer.display_games_table(games, output='quiet')
+            if df.empty:
+                return games, df, None, None
+            # 按列整体取值，列表控件只会绘制可见的行
+            status = analyzer.play_status.classify(df['游玩时长(小时)'])
+            names = df['游戏名称'].tolist()
+            rows = list(zip(names, df['游玩时长'].tolist(), status.astype(str)))
+            sort_keys = {
+                'name': [name.casefold() for name in names],
+                'hours': df['游玩时长(分钟)'].tolist(),
+                'status': status.codes.tolist(),
+            }
+        return games, df, rows, sort_keys
             
-    def _update_ui_after_fetch(self, games):
+    def _update_ui_after_fetch(self, result):
         """获取数据后的UI更新"""
+        games, df, rows, sort_keys = result
         self.fetch_button.config(state="normal", text="获取游戏数据")
+        self._job_finished()
         
         if not games:
             self.result_text.delete(1.0, tk.END)
@@ -205,34 +272,32 @@ class SteamAnalyzerUI:
             return
             
         self.games_data = games
-        # 传递API密钥和Steam ID以确保功能完整
-        api_key = self.api_key_entry.get().strip()
-        steam_id = self.steam_id_entry.get().strip()
-        analyzer = SteamGameAnalyzer(api_key, steam_id)
-        self.df = analyzer.display_games_table(games)
+        self.df = df
         
         # 显示结果
         self.result_text.delete(1.0, tk.END)
-        self.result_text.insert(tk.END, f"成功获取到 {len(games)} 款游戏的数据\n\n")
+        self.result_text.insert(tk.END, f"成功获取到 {len(games)} 款游戏的数据\n")
         
         # 显示表格数据
-        if self.df is not None and not self.df.empty:
-            for index, row in self.df.iterrows():
-                self.result_text.insert(tk.END, f"{row['游戏名称']} - {row['游玩时长']}\n")
+        if rows:
+            self.game_list.set_data(rows, sort_keys)
             
-            # 启用生成图表按钮
+            # 启用生成图表和导出按钮
             self.chart_button.config(state="normal")
+            self.export_button.config(state="normal")
         else:
+            self.game_list.clear()
             self.result_text.insert(tk.END, "没有游戏数据可显示\n")
             
     def _handle_fetch_error(self, error_message):
         """处理获取数据时的错误"""
         self.fetch_button.config(state="normal", text="获取游戏数据")
+        self._job_finished()
         self.result_text.delete(1.0, tk.END)
         self.result_text.insert(tk.END, f"获取数据时发生错误: {error_message}\n")
         
     def generate_charts(self):
-        """生成分析图表"""
+        """在内存中渲染图表并显示在窗口内的预览页中，不写入文件"""
         if self.df is None or self.df.empty:
             messagebox.showerror("错误", "没有数据可生成图表")
             return
@@ -240,36 +305,125 @@ class SteamAnalyzerUI:
         try:
             # 禁用按钮并显示加载状态
             self.chart_button.config(state="disabled", text="生成中...")
+            self.cancel_button.config(state="normal")
             
-            # 在新线程中生成图表
-            threading.Thread(target=self._generate_charts_thread, daemon=True).start()
-        except Exception as e:
-            self.chart_button.config(state="normal", text="生成分析图表")
-            messagebox.showerror("错误", f"生成图表时发生错误: {str(e)}")
+            # 预览按显示区域的大小缩放，区域尚未显示时使用整个标签页的大小
+            self.root.update_idletasks()
+            width = max(self.preview_label.winfo_width(), self.result_notebook.winfo_width(), 200)
+            height = max(self.preview_label.winfo_height(), self.result_notebook.winfo_height() - 30, 200)
             
-    def _generate_charts_thread(self):
-        """在后台线程中生成图表"""
-        try:
-            # 传递API密钥和Steam ID以确保功能完整
+            # 交给后台任务调度器执行，同一份数据只会生成一次
             api_key = self.api_key_entry.get().strip()
             steam_id = self.steam_id_entry.get().strip()
-            analyzer = SteamGameAnalyzer(api_key, steam_id)
-            analyzer.generate_charts(self.df)
-            
-            # 在主线程中更新UI
-            self.root.after(0, self._update_ui_after_charts)
+            self.jobs.submit(('preview', api_key, steam_id, id(self.df)), self._preview_charts_job,
+                             api_key, steam_id, self.df, (width, height),
+                             on_progress=self._update_progress, on_done=self._update_ui_after_preview,
+                             on_error=self._handle_chart_error, on_cancel=self._handle_job_cancelled)
         except Exception as e:
-            self.root.after(0, self._handle_chart_error, str(e))
-            
-    def _update_ui_after_charts(self):
-        """生成图表后的UI更新"""
+            self.chart_button.config(state="normal", text="生成分析图表")
+            messagebox.showerror("错误", f"生成图表时发生错误: {str(e)}")
+    
+    def _preview_charts_job(self, job, api_key, steam_id, df, size):
+        """在后台线程中渲染预览图并解码、缩放，界面线程只需要创建PhotoImage"""
+        analyzer = self.jobs.analyzer_for(job, api_key, steam_id, font_path=self.font_path)
+        buffer = analyzer.generate_charts(df, 'preview', to_buffer=True)
+        if buffer is None:
+            return None, analyzer.timer.format_report()
+        with analyzer.timer.stage('解码预览'):
+            # Pillow是matplotlib的依赖，无需额外安装
+            from PIL import Image
+            image = Image.open(buffer)
+            image.thumbnail(size, Image.LANCZOS)
+        return image, analyzer.timer.format_report()
+    
+    def _update_ui_after_preview(self, result):
+        """把解码好的预览图显示在窗口中"""
+        image, timings = result
         self.chart_button.config(state="normal", text="生成分析图表")
-        messagebox.showinfo("完成", "图表已生成并保存到文件中")
+        self.export_button.config(state="normal")
+        self._job_finished()
+        if timings:
+            self.result_text.insert(tk.END, f"\n图表生成各阶段耗时:\n{timings}\n")
+            self.result_text.see(tk.END)
+        if image is None:
+            messagebox.showerror("错误", "没有数据可生成图表")
+            return
+        from PIL import ImageTk
+        # 需要保留对PhotoImage的引用，否则图片会被回收
+        self.preview_image = ImageTk.PhotoImage(image)
+        self.preview_label.config(image=self.preview_image, text="")
+        self.result_notebook.select(self.preview_label)
+    
+    def export_charts(self):
+        """按所选的渲染配置导出完整分辨率的图表文件"""
+        if self.df is None or self.df.empty:
+            messagebox.showerror("错误", "没有数据可生成图表")
+            return
+        
+        self.export_button.config(state="disabled", text="导出中...")
+        self.cancel_button.config(state="normal")
+        api_key = self.api_key_entry.get().strip()
+        steam_id = self.steam_id_entry.get().strip()
+        profile = self.render_profile_var.get()
+        self.jobs.submit(('export', api_key, steam_id, id(self.df), profile), self._export_charts_job,
+                         api_key, steam_id, self.df, profile,
+                         on_progress=self._update_progress, on_done=self._update_ui_after_export,
+                         on_error=self._handle_chart_error, on_cancel=self._handle_job_cancelled)
+            
+    def _export_charts_job(self, job, api_key, steam_id, df, profile="standard"):
+        """在后台线程中生成图表文件，返回(文件名, 各阶段耗时)"""
+        analyzer = self.jobs.analyzer_for(job, api_key, steam_id, font_path=self.font_path)
+        filename = analyzer.generate_charts(df, profile)
+        return filename, analyzer.timer.format_report()
+            
+    def _update_ui_after_export(self, result):
+        """导出图表后的UI更新"""
+        filename, timings = result
+        self.export_button.config(state="normal", text="导出图表")
+        self._job_finished()
+        if timings:
+            # 在结果区域末尾追加各阶段耗时，便于定位生成缓慢的原因
+            self.result_text.insert(tk.END, f"\n图表导出各阶段耗时:\n{timings}\n")
+            self.result_text.see(tk.END)
+        if filename:
+            messagebox.showinfo("完成", f"图表已生成并保存为: {filename}")
+        else:
+            messagebox.showinfo("完成", "图表已生成并保存到文件中")
         
     def _handle_chart_error(self, error_message):
         """处理生成图表时的错误"""
         self.chart_button.config(state="normal", text="生成分析图表")
+        self.export_button.config(state="normal", text="导出图表")
+        self._job_finished()
         messagebox.showerror("错误", f"生成图表时发生错误: {error_message}")
+    
+    def _update_progress(self, stage):
+        """显示后台任务当前所处的阶段"""
+        self.progress_var.set(f"正在执行: {stage}")
+    
+    def _job_finished(self):
+        """任务结束后，没有其他任务在执行时清除进度并禁用取消按钮"""
+        if not self.jobs.busy:
+            self.progress_var.set("")
+            self.cancel_button.config(state="disabled")
+    
+    def cancel_jobs(self):
+        """取消所有排队中和正在执行的任务"""
+        self.jobs.cancel_all()
+        self.progress_var.set("正在取消...")
+    
+    def _handle_job_cancelled(self):
+        self.fetch_button.config(state="normal", text="获取游戏数据")
+        has_data = self.df is not None and not self.df.empty
+        self.chart_button.config(state="normal" if has_data else "disabled", text="生成分析图表")
+        self.export_button.config(state="normal" if has_data else "disabled", text="导出图表")
+        self._job_finished()
+        self.result_text.insert(tk.END, "任务已取消\n")
+    
+    def on_close(self):
+        """关闭窗口时取消后台任务并释放分析器"""
+        self.jobs.shutdown()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,179 @@
+import sys
+sys.dont_write_bytecode = True
+
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from steam_game_analyzer import (SteamGameAnalyzer, ResponseCache, TokenBucket, create_session, build_games_frame,
+                                 iter_table_chunks, summarize_games_frame, DEFAULT_TABLE_TOP_N)
+from playtime_history import PlaytimeHistory
+from game_export import GameDataExporter, games_export_frame, EXPORT_FORMATS
+
+# 批量分析默认配置
+DEFAULT_WORKERS = 8  # 并发线程数
+DEFAULT_RATE = 2.0  # 全局请求速率(次/秒)，Steam Web API每日配额约为10万次
+DEFAULT_BURST = 5  # 令牌桶容量，允许的瞬时突发请求数
+
+
+class BatchResult:
+    """单个账号的批量获取结果"""
+
+    def __init__(self, steam_id, games, error=None, elapsed=0.0):
+        self.steam_id = steam_id
+        self.games = games
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def to_dict(self):
+        """转换为便于写入JSON Lines的摘要信息"""
+        return {
+            'steam_id': self.steam_id,
+            'ok': self.ok,
+            'error': self.error,
+            'game_count': len(self.games),
+            'total_minutes': sum(game.get('playtime_forever', 0) for game in self.games),
+            'elapsed': round(self.elapsed, 3),
+        }
+
+
+def iter_batch_owned_games(api_key, steam_ids, max_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                           force_refresh=False, cache=None, history=None, base_url=None):
+    """并发获取多个账号的游戏列表，按完成顺序逐个产出BatchResult
+
+    所有请求共享同一个连接池会话、响应缓存、历史快照库和令牌桶限流器；单个账号失败只会体现在
+    对应结果的error字段中，不会中断整个批次。base_url用于替换Steam Web API的地址。
+    """
+    # 去重并保持输入顺序
+    steam_ids = list(dict.fromkeys(sid.strip() for sid in steam_ids if sid and sid.strip()))
+    limiter = TokenBucket(rate, burst)
+    session = create_session(pool_size=max_workers)
+    if cache is None:
+        cache = ResponseCache()
+    if history is None:
+        history = PlaytimeHistory()
+
+    def fetch(steam_id):
+        start = time.perf_counter()
+        analyzer = SteamGameAnalyzer(api_key, steam_id, session=session, cache=cache, history=history,
+                                     rate_limiter=limiter)
+        if base_url:
+            analyzer.base_url = base_url
+        try:
+            games = analyzer.fetch_owned_games(force_refresh)
+            return BatchResult(steam_id, games, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return BatchResult(steam_id, [], error=str(e), elapsed=time.perf_counter() - start)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(fetch, steam_id) for steam_id in steam_ids]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # 调用方提前停止迭代时，取消尚未开始的任务
+        executor.shutdown(wait=True, cancel_futures=True)
+        session.close()
+
+
+def print_games_table(df, mode, top_n=DEFAULT_TABLE_TOP_N):
+    """批量任务中只输出摘要或前top_n款游戏，不格式化整个游戏库"""
+    if mode == 'summary':
+        print(summarize_games_frame(df))
+    else:
+        for chunk in iter_table_chunks(df, limit=top_n):
+            print(chunk)
+    print()
+
+
+def load_steam_ids(path):
+    """从文本文件读取Steam ID列表，每行一个，忽略空行和#开头的注释"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def load_default_api_key():
+    """从界面保存的config.json中读取API密钥"""
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('api_key', '')
+    except (OSError, ValueError):
+        return ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量并发获取多个Steam账号的游戏数据")
+    parser.add_argument('steam_ids', nargs='*', help="要分析的Steam ID")
+    parser.add_argument('--ids-file', help="Steam ID列表文件，每行一个")
+    parser.add_argument('--api-key', default=None, help="Steam API密钥，默认读取config.json")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="并发线程数")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="全局请求速率上限(次/秒)")
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help="允许的瞬时突发请求数")
+    parser.add_argument('--force-refresh', action='store_true', help="忽略本地缓存，重新请求API")
+    parser.add_argument('--output', help="将每个账号的结果摘要以JSON Lines格式写入该文件")
+    parser.add_argument('--table', default='quiet', choices=['quiet', 'summary', 'top'],
+                        help="在终端中为每个账号额外输出游戏库摘要或游玩时长前N款游戏")
+    parser.add_argument('--top', type=int, default=DEFAULT_TABLE_TOP_N, help="--table top时输出的游戏数量")
+    parser.add_argument('--export', metavar='PATH',
+                        help="把所有账号的游戏数据逐个写入同一个数据集，格式由扩展名决定(.csv/.jsonl/.parquet)")
+    parser.add_argument('--export-format', choices=EXPORT_FORMATS, help="指定导出格式，不根据扩展名判断")
+    parser.add_argument('--append', action='store_true',
+                        help="追加到已有的导出数据而不是覆盖；Parquet格式时PATH为数据集目录")
+    args = parser.parse_args(argv)
+
+    steam_ids = list(args.steam_ids)
+    if args.ids_file:
+        steam_ids.extend(load_steam_ids(args.ids_file))
+    if not steam_ids:
+        parser.error("请提供至少一个Steam ID")
+
+    api_key = args.api_key or load_default_api_key()
+    if not api_key:
+        parser.error("请通过--api-key提供API密钥，或先在界面中保存配置")
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    exporter = GameDataExporter(args.export, args.export_format, args.append) if args.export else None
+    succeeded = failed = 0
+    try:
+        results = iter_batch_owned_games(api_key, steam_ids, max_workers=args.workers, rate=args.rate,
+                                         burst=args.burst, force_refresh=args.force_refresh)
+        for i, result in enumerate(results, 1):
+            if result.ok:
+                succeeded += 1
+                print(f"[{i}] {result.steam_id}: {len(result.games)} 款游戏 ({result.elapsed:.2f}秒)")
+                if (exporter or args.table != 'quiet') and result.games:
+                    df = build_games_frame(result.games)
+                    if exporter:
+                        exporter.write(games_export_frame(df, result.steam_id))
+                    if args.table != 'quiet':
+                        print_games_table(df, args.table, args.top)
+            else:
+                failed += 1
+                print(f"[{i}] {result.steam_id}: 获取失败 - {result.error}")
+            if output:
+                output.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+                output.flush()
+    except BaseException:
+        if exporter:
+            exporter.abort()
+        raise
+    finally:
+        if output:
+            output.close()
+
+    if exporter:
+        exporter.close()
+        print(f"已导出 {exporter.rows_written} 行游戏数据到: {args.export}")
+    print(f"\n批量分析完成: 成功 {succeeded} 个，失败 {failed} 个")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
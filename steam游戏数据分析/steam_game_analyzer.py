@@ -1,25 +1,822 @@
 import sys
 sys.dont_write_bytecode = True
 
+import io
+import os
+import json
+import random
+import time
+import hashlib
+import tempfile
+import threading
+import platform
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # 设置matplotlib后端以避免GUI线程问题
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 
+from playtime_history import PlaytimeHistory
+from game_metadata import GameMetadataStore
+from game_export import GameDataExporter, games_export_frame, EXPORT_FORMATS
+
+def _import_pyplot():
+    """延迟导入matplotlib和seaborn，只在第一次绘图时才付出导入开销"""
+    import matplotlib
+    if matplotlib.get_backend().lower() != 'agg':
+        matplotlib.use('Agg')  # 设置matplotlib后端以避免GUI线程问题
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+# 网络请求配置
+DEFAULT_TIMEOUT = (5, 30)  # (连接超时, 读取超时)，单位秒
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}  # 需要重试的状态码: 限流及服务端错误
+MAX_BACKOFF = 30  # 单次重试最长等待时间(秒)
+
+# 游戏元数据(商店信息、成就)补充配置
+STORE_API_URL = "https://store.steampowered.com/api"
+DEFAULT_ENRICH_WORKERS = 4  # 补充元数据时的并发请求数
+DEFAULT_STORE_RATE = 0.6  # 商店接口请求速率(次/秒)，商店接口限制约为每5分钟200次
+DEFAULT_STORE_BURST = 5
+PRICE_BATCH_SIZE = 100  # 商店接口只有price_overview支持一次查询多个appid
+
+
+def create_session(pool_size=10):
+    """创建带连接池和keep-alive的HTTP会话，可在多个分析器之间共享"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器，多个分析器共享时可把总请求速率控制在API配额以内"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate  # 每秒补充的令牌数
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """取走一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# 响应缓存配置
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".steam_cache")
+DEFAULT_CACHE_TTL = 3600  # 缓存有效期(秒)
+DEFAULT_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 缓存目录占用上限(字节)
+
+
+def _atomic_write(path, data):
+    """先写入同目录的临时文件再替换目标文件，避免中断时留下半截内容"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _evict_lru(directory, suffix, max_bytes, keep=None):
+    """目录内文件总大小超过上限时，按最近访问时间(mtime)从旧到新删除文件，keep指定的文件不会被删除"""
+    files = []
+    total = 0
+    for entry in os.scandir(directory):
+        # 跳过正在写入的临时文件
+        if entry.is_file() and entry.name.endswith(suffix) and not entry.name.startswith('.tmp_'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    
+    files.sort()
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+class ResponseCache:
+    """Steam Web API响应的磁盘缓存，按接口+Steam ID存储，支持TTL过期和LRU淘汰"""
+    
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_CACHE_TTL, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _path(self, endpoint, key):
+        digest = hashlib.sha1(f"{endpoint}|{key}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+    
+    def get(self, endpoint, key):
+        """读取未过期的缓存数据，未命中或已过期时返回None"""
+        path = self._path(endpoint, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if time.time() - entry.get('created', 0) > self.ttl:
+            return None
+        
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get('data')
+    
+    def set(self, endpoint, key, data):
+        """写入缓存，超出容量时淘汰最久未访问的条目"""
+        entry = {'endpoint': endpoint, 'key': key, 'created': time.time(), 'data': data}
+        path = self._path(endpoint, key)
+        _atomic_write(path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            _evict_lru(self.cache_dir, '.json', self.max_bytes, keep=path)
+    
+    def clear(self):
+        """清空缓存目录中的所有条目"""
+        with self._lock:
+            _evict_lru(self.cache_dir, '.json', 0)
+
+
+class StageTimer:
+    """记录分析流程中各阶段的耗时和峰值内存
+
+    用stage()标记阶段，阶段可以嵌套（如图表渲染下的各个面板），report()返回可直接序列化为JSON的结果。
+    track_memory为True时用tracemalloc统计每个阶段相对开始时新增内存的峰值，会明显拖慢执行，默认只计时。
+    listener不为空时，每进入一个阶段都会以阶段路径调用它，可用于报告进度；listener抛出的异常会中止当前流程。
+    注意matplotlib是延迟绘制的：面板阶段只包含创建图形元素的开销，真正的绘制耗时体现在布局和保存阶段。
+    """
+
+    def __init__(self, track_memory=False, listener=None):
+        self.track_memory = track_memory
+        self.listener = listener
+        self.reset()
+
+    def reset(self):
+        """清空已记录的阶段，开始新一轮统计"""
+        self.stages = []
+        self._stack = []
+        self._started_tracing = False
+        self.started_at = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        """记录with块内的耗时，嵌套使用时路径为'父阶段/子阶段'"""
+        path = '/'.join([entry['name'] for entry in self._stack] + [name])
+        if self.listener is not None:
+            self.listener(path)
+        entry = {'name': name, 'path': path, 'depth': len(self._stack),
+                 'start': round(time.time() - self.started_at, 4), 'seconds': None, 'peak_bytes': None, 'ok': True}
+        self.stages.append(entry)
+        if self.track_memory:
+            self._enter_memory(entry)
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield entry
+        except BaseException:
+            entry['ok'] = False
+            raise
+        finally:
+            entry['seconds'] = round(time.perf_counter() - start, 4)
+            self._stack.pop()
+            if self.track_memory:
+                self._exit_memory(entry)
+
+    def _enter_memory(self, entry):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        # reset_peak会清掉外层阶段尚未读取的峰值，先把它保存到外层阶段中
+        if self._stack:
+            parent = self._stack[-1]
+            parent['_peak'] = max(parent['_peak'], peak)
+        tracemalloc.reset_peak()
+        entry['_base'] = entry['_peak'] = current
+
+    def _exit_memory(self, entry):
+        peak = max(entry.pop('_peak'), tracemalloc.get_traced_memory()[1])
+        entry['peak_bytes'] = peak - entry.pop('_base')
+        if self._stack:
+            parent = self._stack[-1]
+            parent['_peak'] = max(parent['_peak'], peak)
+        elif self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        """返回统计结果字典"""
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'total_seconds': round(sum(entry['seconds'] or 0 for entry in self.stages if entry['depth'] == 0), 4),
+            'track_memory': self.track_memory,
+            'stages': [{k: v for k, v in entry.items() if not k.startswith('_')} for entry in self.stages],
+        }
+
+    def to_json(self):
+        return json.dumps(self.report(), ensure_ascii=False, indent=2)
+
+    def format_report(self):
+        """格式化为便于在终端或界面中阅读的多行文本"""
+        lines = []
+        for entry in self.stages:
+            seconds = entry['seconds'] if entry['seconds'] is not None else 0
+            line = f"{'  ' * entry['depth']}{entry['name']}: {seconds * 1000:.0f}ms"
+            if entry['peak_bytes'] is not None:
+                line += f", 峰值内存 {entry['peak_bytes'] / 1024 / 1024:.1f}MB"
+            if not entry['ok']:
+                line += " (出错)"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+class PlaytimeBuckets:
+    """按游玩时长(小时)分组的规则，对整列数据做向量化分类
+
+    edges为升序的区间边界，labels依次对应各区间，区间左闭右开：
+    edges=[10, 50] 对应 [0,10)、[10,50)、[50,∞) 三组。
+    zero_label不为空时，时长为0的游戏单独归为排在最前的一组。
+    """
+    
+    def __init__(self, edges, labels, zero_label=None):
+        edges = [float(edge) for edge in edges]
+        if edges != sorted(edges):
+            raise ValueError("分组边界必须按升序排列")
+        if len(labels) != len(edges) + 1:
+            raise ValueError("分组标签数量必须比分组边界多一个")
+        self.edges = np.asarray(edges)
+        self.labels = list(labels)
+        self.zero_label = zero_label
+    
+    @classmethod
+    def from_edges(cls, edges, zero_label=None, unit='小时'):
+        """根据分组边界自动生成"a-b小时"形式的标签"""
+        bounds = [0] + list(edges)
+        labels = [f"{lo:g}-{hi:g}{unit}" for lo, hi in zip(bounds, bounds[1:])]
+        labels.append(f"{bounds[-1]:g}{unit}以上")
+        return cls(edges, labels, zero_label)
+    
+    @property
+    def categories(self):
+        """按顺序排列的全部分组标签"""
+        return ([self.zero_label] if self.zero_label is not None else []) + self.labels
+    
+    def classify(self, hours):
+        """对时长数组分组，返回与输入等长的有序Categorical"""
+        hours = np.asarray(hours, dtype=float)
+        codes = np.searchsorted(self.edges, hours, side='right')
+        if self.zero_label is not None:
+            codes = np.where(hours == 0, 0, codes + 1)
+        return pd.Categorical.from_codes(codes, categories=self.categories, ordered=True)
+
+
+# 默认的时长分组和游玩状态分类规则
+DEFAULT_PLAYTIME_GROUPS = PlaytimeBuckets(
+    [10, 50, 100, 500],
+    ['1-10小时', '10-50小时', '50-100小时', '100-500小时', '500小时以上'],
+    zero_label='未游玩')
+DEFAULT_PLAY_STATUS = PlaytimeBuckets(
+    [5, 20, 100],
+    ['浅尝辄止', '适度游玩', '深度体验', '核心玩家'],
+    zero_label='未开始')
+
+
+def format_playtime_series(minutes):
+    """将一列分钟数转换为"x.x小时"格式的字符串"""
+    return (pd.Series(minutes) / 60).map('{:.1f}小时'.format)
+
+
+# 游戏表格的列名
+GAME_TABLE_COLUMNS = ['游戏名称', '游玩时长(分钟)', '游玩时长(小时)', '游玩时长', '是否游玩', 'appid']
+
+
+def build_games_frame(games):
+    """一次遍历完成校验，并把GetOwnedGames的游戏列表直接转换为按游玩时长降序排列的DataFrame
+
+    缺少appid、name或playtime_forever字段的条目会被跳过；名称为空(null)的游戏使用"未知游戏(appid)"，
+    保证游戏名称列全部是字符串。数据先写入预分配的定长数组，
+    分钟数和appid使用int32，排序只做一次argsort，避免中间拷贝。
+    游戏名称在同一个游戏库中几乎各不相同，转为category类型只会增加哈希开销和内存，因此保持字符串。
+    """
+    count = len(games)
+    names = np.empty(count, dtype=object)
+    minutes = np.empty(count, dtype=np.int32)
+    appids = np.empty(count, dtype=np.int32)
+    
+    valid = 0
+    for game in games:
+        try:
+            minutes[valid] = game['playtime_forever']
+            appids[valid] = game['appid']
+            name = game['name']
+            if not isinstance(name, str):
+                name = f"未知游戏({appids[valid]})" if name is None or name != name else str(name)
+            names[valid] = name
+        except (KeyError, TypeError, ValueError, OverflowError):
+            print(f"警告: 跳过格式不正确的游戏数据: {game}")
+            continue
+        valid += 1
+    
+    # 按游玩时长降序排列，时长相同的游戏保持原有顺序
+    order = np.argsort(-minutes[:valid], kind='stable')
+    names = names[:valid][order]
+    minutes = minutes[:valid][order]
+    appids = appids[:valid][order]
+    
+    return pd.DataFrame({
+        '游戏名称': names,
+        '游玩时长(分钟)': minutes,
+        '游玩时长(小时)': minutes / 60,
+        '游玩时长': format_playtime_series(minutes).values,
+        '是否游玩': minutes > 0,
+        'appid': appids,
+    }, columns=GAME_TABLE_COLUMNS, copy=False)
+
+
+# 游戏表格的输出方式：full逐块输出全部行，top只输出前N行，summary只输出统计摘要，quiet不输出
+TABLE_OUTPUT_MODES = ('full', 'top', 'summary', 'quiet')
+TABLE_CHUNK_SIZE = 500  # 逐块格式化表格时每块的行数
+DEFAULT_TABLE_TOP_N = 20
+
+
+def _format_table_column(series):
+    """把一列格式化为字符串，浮点数保留两位小数，缺失值显示为空"""
+    if pd.api.types.is_float_dtype(series):
+        return series.map('{:.2f}'.format)
+    # pandas 3的字符串类型在astype(str)后仍保留NaN，拼接前需要替换掉
+    return series.astype(str).fillna('')
+
+
+def iter_table_chunks(df, chunk_size=TABLE_CHUNK_SIZE, limit=None):
+    """逐块格式化游戏表格，每次产出一块文本（第一块带表头）
+
+    与df.to_string()一次性把整张表拼成一个巨大的字符串不同，调用方可以边格式化边输出，
+    提前停止迭代时剩余的行不会被格式化。列宽根据各列最大值预先估算，各块之间保持对齐。
+    limit为最多输出的行数。
+    """
+    if df.empty:
+        return
+    df = df.iloc[:limit] if limit is not None else df
+    widths = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            width = 5
+        elif pd.api.types.is_float_dtype(series):
+            width = len(f"{series.max():.2f}")
+        elif pd.api.types.is_numeric_dtype(series):
+            width = len(str(series.max()))
+        else:
+            width = int(_format_table_column(series).str.len().max())
+        widths.append(max(width, len(str(col))))
+    
+    header = ' '.join(str(col).rjust(width) for col, width in zip(df.columns, widths))
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        columns = [_format_table_column(chunk[col]).str.rjust(width) for col, width in zip(chunk.columns, widths)]
+        body = '\n'.join(columns[0].str.cat(columns[1:], sep=' '))
+        yield f"{header}\n{body}" if start == 0 else body
+
+
+def histogram_bins(max_hours):
+    """根据最长游玩时长选择直方图的区间划分"""
+    if max_hours <= 10:
+        # 对于较小的时长，使用更细的区间
+        return [0, 1, 2, 5, 10]
+    elif max_hours <= 20:
+        # 中等时长范围
+        return [0, 1, 5, 10, 15, 20]
+    elif max_hours <= 50:
+        # 中等时长范围
+        return [0, 5, 10, 20, 30, 40, 50]
+    elif max_hours <= 100:
+        # 较大时长范围
+        return [0, 10, 20, 30, 50, 75, 100]
+    elif max_hours <= 300:
+        # 更大的时长范围
+        return [0, 20, 50, 100, 150, 200, 250, 300]
+    # 很大的时长范围
+    return [0, 50, 100, 200, 300, 500, 800, 1200]
+
+
+class AnalysisResult:
+    """游戏库的全部统计结果，创建时一次性计算，图表和文字/JSON摘要都从这里读取
+
+    只读取输入DataFrame的'游戏名称'和'游玩时长(小时)'两列，不会修改它。
+    所有数组都按游玩时长降序排列。
+    """
+    
+    PERCENTILES = (25, 50, 75, 90, 99)
+    
+    def __init__(self, df, playtime_groups=DEFAULT_PLAYTIME_GROUPS, play_status=DEFAULT_PLAY_STATUS,
+                 top_n=10, rank_n=20):
+        hours = df['游玩时长(小时)'].to_numpy(dtype=float)
+        # build_games_frame的结果已经有序，稳定排序在这种情况下几乎没有开销
+        order = np.argsort(-hours, kind='stable')
+        self.hours = hours[order]
+        self.names = df['游戏名称'].to_numpy()[order]
+        
+        count = len(self.hours)
+        self.total_games = count
+        self.played_count = int(np.count_nonzero(self.hours > 0))
+        self.unplayed_count = count - self.played_count
+        self.played_ratio = self.played_count / count if count else 0.0
+        
+        self.cumulative_hours = np.cumsum(self.hours)
+        self.total_hours = float(self.cumulative_hours[-1]) if count else 0.0
+        self.mean_hours = self.total_hours / count if count else 0.0
+        self.played_mean_hours = self.total_hours / self.played_count if self.played_count else 0.0
+        self.median_hours = float(np.median(self.hours)) if count else 0.0
+        # 与pandas的std()一致，使用样本标准差
+        self.std_hours = float(np.std(self.hours, ddof=1)) if count > 1 else float('nan')
+        self.max_hours = float(self.hours[0]) if count else 0.0
+        self.percentiles = dict(zip(self.PERCENTILES, np.percentile(self.hours, self.PERCENTILES))) if count else {}
+        self.histogram_bins = histogram_bins(self.max_hours)
+        
+        # 前top_n名及其余游戏的时长，用于条形图和饼图
+        self.top_names = self.names[:top_n]
+        self.top_hours = self.hours[:top_n]
+        self.top_percentages = self.top_hours / self.total_hours * 100 if self.total_hours else np.zeros(len(self.top_hours))
+        self.others_hours = self.total_hours - float(self.top_hours.sum())
+        
+        # 前rank_n名的时长及其线性趋势(polyfit系数)
+        self.rank_hours = self.hours[:rank_n]
+        self.rank_trend = (np.polyfit(np.arange(1, len(self.rank_hours) + 1), self.rank_hours, 1)
+                           if len(self.rank_hours) > 1 else None)
+        
+        # 按分组规则统计每组的游戏数量，顺序与规则中定义的顺序一致
+        self.playtime_groups = playtime_groups.classify(self.hours)
+        self.play_status = play_status.classify(self.hours)
+        self.group_counts = pd.Series(self.playtime_groups).value_counts(sort=False)
+        self.status_counts = pd.Series(self.play_status).value_counts(sort=False)
+        
+        # 可选的商店信息和成就(enrich_games的结果)，由run_analysis在启用补充时填入
+        self.metadata = None
+    
+    def summary_text(self, top_n=5):
+        """生成游戏库的文字摘要：游戏数、已玩比例、总时长及游玩时长最多的游戏"""
+        if not self.total_games:
+            return "没有游戏数据"
+        lines = [
+            f"游戏总数: {self.total_games}，已玩: {self.played_count} ({self.played_ratio:.1%})，未玩: {self.unplayed_count}",
+            f"总游玩时长: {self.total_hours:.1f}小时，已玩游戏平均: {self.played_mean_hours:.1f}小时",
+        ]
+        if self.played_count:
+            top = min(top_n, self.total_games)
+            lines.append(f"游玩时长最多的{top}款游戏:")
+            lines.extend(f"  {name} - {hours:.1f}小时" for name, hours in zip(self.names[:top], self.hours[:top]))
+        return '\n'.join(lines)
+    
+    def to_dict(self, top_n=10):
+        """转换为可直接序列化为JSON的字典"""
+        def number(value):
+            return None if value != value else round(float(value), 4)  # NaN转为null
+        
+        return {
+            'total_games': self.total_games,
+            'played_games': self.played_count,
+            'unplayed_games': self.unplayed_count,
+            'played_ratio': number(self.played_ratio),
+            'total_hours': number(self.total_hours),
+            'mean_hours': number(self.mean_hours),
+            'played_mean_hours': number(self.played_mean_hours),
+            'median_hours': number(self.median_hours),
+            'std_hours': number(self.std_hours),
+            'max_hours': number(self.max_hours),
+            'percentiles': {str(p): number(v) for p, v in self.percentiles.items()},
+            'playtime_groups': {str(k): int(v) for k, v in self.group_counts.items()},
+            'play_status': {str(k): int(v) for k, v in self.status_counts.items()},
+            'top_games': [{'name': str(name), 'hours': number(hours)}
+                          for name, hours in zip(self.names[:top_n], self.hours[:top_n])],
+        }
+    
+    def to_json(self, top_n=10):
+        return json.dumps(self.to_dict(top_n), ensure_ascii=False, indent=2)
+
+
+def summarize_games_frame(df, top_n=5):
+    """生成游戏库的文字摘要：游戏数、已玩比例、总时长及游玩时长最多的游戏"""
+    if df.empty:
+        return "没有游戏数据"
+    return AnalysisResult(df, top_n=top_n).summary_text(top_n)
+
+
+# 图表渲染配置：分辨率、输出格式、是否计算紧凑边界(bbox_inches='tight')及是否执行tight_layout
+RenderProfile = namedtuple('RenderProfile', ['name', 'dpi', 'fmt', 'tight_bbox', 'tight_layout'])
+
+RENDER_PROFILES = {
+    'preview': RenderProfile('preview', dpi=72, fmt='png', tight_bbox=False, tight_layout=False),
+    'standard': RenderProfile('standard', dpi=150, fmt='png', tight_bbox=False, tight_layout=True),
+    'print': RenderProfile('print', dpi=300, fmt='png', tight_bbox=True, tight_layout=True),
+    'svg': RenderProfile('svg', dpi=72, fmt='svg', tight_bbox=True, tight_layout=True),
+    'pdf': RenderProfile('pdf', dpi=72, fmt='pdf', tight_bbox=True, tight_layout=True),
+}
+DEFAULT_RENDER_PROFILE = 'print'
+
+# 图表缓存配置
+DEFAULT_CHART_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "charts")
+DEFAULT_CHART_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 图表缓存目录占用上限(字节)
+
+
+def get_render_profile(profile):
+    """按名称查找渲染配置，也可以直接传入RenderProfile"""
+    if isinstance(profile, RenderProfile):
+        return profile
+    try:
+        return RENDER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"未知的渲染配置: {profile}，可选: {', '.join(RENDER_PROFILES)}")
+
+
+# 中文字体配置
+# 不放在响应缓存目录中：ResponseCache.clear()和LRU淘汰会删除该目录下所有的.json文件
+FONT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chart_font.json")
+_resolved_fonts = {}  # 进程内已解析的字体: 字体文件路径(None表示自动探测) -> 字体名称
+_font_lock = threading.Lock()
+_render_lock = threading.Lock()  # pyplot的全局状态不是线程安全的，渲染需要串行执行
+
+
+def _candidate_fonts():
+    """按操作系统返回候选中文字体列表"""
+    system = platform.system()
+    if system == "Windows":
+        return ['SimHei', 'Microsoft YaHei', 'SimSun', 'FangSong']
+    elif system == "Darwin":  # macOS
+        return ['Arial Unicode MS', 'Heiti SC']
+    else:  # Linux and others
+        return ['WenQuanYi Micro Hei', 'DejaVu Sans', 'Bitstream Vera Sans']
+
+
+def _load_persisted_font():
+    """读取上次探测到的字体，系统、matplotlib版本或字体文件变化时视为失效"""
+    import matplotlib
+    
+    try:
+        with open(FONT_CACHE_FILE, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get('system') != platform.system() or entry.get('matplotlib') != matplotlib.__version__:
+        return None
+    if not entry.get('font'):
+        return None
+    if entry.get('font_file') and not os.path.exists(entry['font_file']):
+        return None
+    return entry
+
+
+def _probe_system_font():
+    """扫描matplotlib字体列表，返回第一个可用的候选字体名称及其文件路径"""
+    import matplotlib.font_manager as fm
+    
+    font_files = {}
+    for font in fm.fontManager.ttflist:
+        font_files.setdefault(font.name, font.fname)
+    for name in _candidate_fonts():
+        if name in font_files:
+            return name, font_files[name]
+    return None, None
+
+
+def resolve_chart_font(font_path=None):
+    """确定图表使用的中文字体名称，找不到合适字体时返回None
+
+    font_path指定字体文件时直接注册并使用该字体；否则探测系统字体。
+    结果在进程内缓存，自动探测到的字体还会持久化到磁盘，后续运行无需再扫描字体列表；
+    没有找到字体时不持久化，之后安装的字体在下次运行时就能使用。
+    """
+    with _font_lock:
+        if font_path in _resolved_fonts:
+            return _resolved_fonts[font_path]
+        
+        if font_path:
+            import matplotlib.font_manager as fm
+            
+            fm.fontManager.addfont(font_path)
+            name = fm.FontProperties(fname=font_path).get_name()
+        else:
+            entry = _load_persisted_font()
+            if entry is not None:
+                name = entry.get('font')
+            else:
+                import matplotlib
+                
+                name, font_file = _probe_system_font()
+                if name is not None:
+                    entry = {'system': platform.system(), 'matplotlib': matplotlib.__version__,
+                             'font': name, 'font_file': font_file}
+                    try:
+                        _atomic_write(FONT_CACHE_FILE, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+                    except OSError as e:
+                        print(f"保存字体缓存失败: {e}")
+        
+        _resolved_fonts[font_path] = name
+        return name
+
+
+def hash_dataframe(df, columns=None):
+    """计算DataFrame指定列内容的哈希值，行顺序、列名或数据变化都会得到不同的结果"""
+    if columns is not None:
+        df = df[list(columns)]
+    digest = hashlib.sha256()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """已渲染图表的缓存目录，文件按内容哈希命名，超出容量时淘汰最久未使用的图表"""
+    
+    def __init__(self, cache_dir=DEFAULT_CHART_CACHE_DIR, max_bytes=DEFAULT_CHART_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def path_for(self, key, fmt):
+        return os.path.join(self.cache_dir, f"steam_analysis_{key[:24]}.{fmt}")
+    
+    def get(self, key, fmt):
+        """返回已缓存图表的路径，不存在时返回None"""
+        path = self.path_for(key, fmt)
+        try:
+            # 更新访问时间，用于LRU淘汰
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+    
+    def store(self, key, fmt, write):
+        """调用write(临时文件路径)生成图表，完成后原子地放入缓存并返回最终路径"""
+        path = self.path_for(key, fmt)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp_', suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            _evict_lru(self.cache_dir, '', self.max_bytes, keep=path)
+        return path
+
+
 # Steam API配置
 class SteamGameAnalyzer:
-    def __init__(self, api_key, steam_id):
+    def __init__(self, api_key, steam_id, session=None, timeout=DEFAULT_TIMEOUT, max_retries=3, backoff_factor=0.5,
+                 cache=None, rate_limiter=None, playtime_groups=None, play_status=None, chart_cache=None,
+                 font_path=None, history=None, timer=None, metadata=None):
+        """cache/chart_cache为None时使用默认目录的响应缓存和图表缓存，传入False则禁用；
+        rate_limiter为可选的共享限流器(如TokenBucket)，每次发出请求前调用其acquire()；
+        playtime_groups/play_status为自定义的PlaytimeBuckets分组规则，默认使用内置规则；
+        font_path为图表使用的中文字体文件，默认自动探测系统字体；
+        history为游玩时长快照库，None时使用默认的PlaytimeHistory，传入False则不记录历史；
+        timer为记录各阶段耗时的StageTimer，None时创建一个只计时的StageTimer，传入False则不记录；
+        metadata为游戏元数据缓存(GameMetadataStore)，None时在第一次调用enrich_games时创建默认的缓存库"""
         self.api_key = api_key
         self.steam_id = steam_id
         self.base_url = "http://api.steampowered.com"
+        self.store_url = STORE_API_URL
+        
+        # 复用同一个连接池会话，避免每次请求都重新建立TCP连接
+        self._owns_session = session is None
+        self.session = session if session is not None else create_session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.cache = ResponseCache() if cache is None else cache
+        self.rate_limiter = rate_limiter
+        self.playtime_groups = playtime_groups or DEFAULT_PLAYTIME_GROUPS
+        self.play_status = play_status or DEFAULT_PLAY_STATUS
+        self.chart_cache = ChartCache() if chart_cache is None else chart_cache
+        self.font_path = font_path
+        self.history = PlaytimeHistory() if history is None else history
+        self.timer = StageTimer() if timer is None else timer
+        self.metadata = metadata
+    
+    def _stage(self, name):
+        """在timer中记录一个阶段，未启用timer时不做任何事"""
+        return self.timer.stage(name) if self.timer else nullcontext()
+    
+    def close(self):
+        """关闭分析器自己创建的HTTP会话（外部传入的共享会话由调用方负责关闭）"""
+        if self._owns_session:
+            self.session.close()
+    
+    def _retry_delay(self, attempt, retry_after=None):
+        """计算第attempt次重试前的等待时间"""
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF)
+            except ValueError:
+                pass
+        # 指数退避加全随机抖动，避免多个线程同时重试
+        return random.uniform(0, min(self.backoff_factor * (2 ** attempt), MAX_BACKOFF))
+    
+    def _request_json(self, url, params, rate_limiter=None):
+        """发送GET请求并解析JSON，遇到429/5xx或网络错误时按指数退避重试
+
+        rate_limiter用于请求配额与Web API不同的接口（如商店接口），默认使用self.rate_limiter
+        """
+        rate_limiter = rate_limiter if rate_limiter is not None else self.rate_limiter
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                print(f"请求返回状态码 {response.status_code}，{delay:.1f}秒后重试")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                print(f"网络错误: {e}，{delay:.1f}秒后重试")
+            attempt += 1
+            time.sleep(delay)
     
-    def get_owned_games(self):
-        """获取用户拥有的游戏列表及游玩时间"""
-        url = f"{self.base_url}/IPlayerService/GetOwnedGames/v1/"
+    def _get_api(self, endpoint, params, cache_key, force_refresh=False, on_fetched=None):
+        """请求Steam Web API接口，优先返回未过期的本地缓存
+
+        on_fetched只在数据真正来自网络请求时被调用，用于记录新数据（缓存命中时不会重复处理）
+        """
+        if self.cache and not force_refresh:
+            data = self.cache.get(endpoint, cache_key)
+            if data is not None:
+                return data
+        
+        data = self._request_json(f"{self.base_url}/{endpoint}", params)
+        if on_fetched is not None:
+            on_fetched(data)
+        if self.cache:
+            try:
+                self.cache.set(endpoint, cache_key, data)
+            except OSError as e:
+                print(f"写入缓存失败: {e}")
+        return data
+    
+    def _record_history(self, data):
+        """把新获取的游戏列表增量写入历史快照库"""
+        if not self.history:
+            return
+        games = data.get('response', {}).get('games')
+        if not games:
+            return
+        try:
+            changed = self.history.ingest(self.steam_id, games)
+            if changed:
+                print(f"已记录 {changed} 款游戏的游玩时长变化")
+        except Exception as e:
+            print(f"记录游玩历史失败: {e}")
+    
+    def fetch_owned_games(self, force_refresh=False):
+        """获取并校验游戏列表，请求失败时直接抛出异常，供需要区分失败原因的调用方使用"""
+        endpoint = "IPlayerService/GetOwnedGames/v1/"
         params = {
             'key': self.api_key,
             'steamid': self.steam_id,
@@ -28,25 +825,19 @@ class SteamGameAnalyzer:
             'format': 'json'
         }
         
+        data = self._get_api(endpoint, params, self.steam_id, force_refresh, on_fetched=self._record_history)
+        
+        if 'response' in data and 'games' in data['response']:
+            # 字段校验统一在build_games_frame中完成，这里不再逐条遍历
+            return data['response']['games']
+        else:
+            print("未找到游戏数据")
+            return []
+    
+    def get_owned_games(self, force_refresh=False):
+        """获取用户拥有的游戏列表及游玩时间，force_refresh为True时跳过缓存"""
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'response' in data and 'games' in data['response']:
-                games = data['response']['games']
-                # 验证游戏数据格式
-                validated_games = []
-                for game in games:
-                    # 确保必要的字段存在
-                    if 'appid' in game and 'name' in game and 'playtime_forever' in game:
-                        validated_games.append(game)
-                    else:
-                        print(f"警告: 跳过格式不正确的游戏数据: {game}")
-                return validated_games
-            else:
-                print("未找到游戏数据")
-                return []
+            return self.fetch_owned_games(force_refresh)
         except requests.exceptions.RequestException as e:
             print(f"请求错误: {e}")
             return []
@@ -54,14 +845,14 @@ class SteamGameAnalyzer:
             print(f"JSON解析错误: {e}")
             return []
     
-    def get_player_summary(self):
+    def get_player_summary(self, force_refresh=False):
         """获取玩家摘要信息，包括用户名"""
         # 检查API密钥是否为空
         if not self.api_key:
             print("错误: API密钥为空，请检查配置")
             return None
             
-        url = f"{self.base_url}/ISteamUser/GetPlayerSummaries/v2/"
+        endpoint = "ISteamUser/GetPlayerSummaries/v2/"
         params = {
             'key': self.api_key,
             'steamids': self.steam_id,
@@ -69,9 +860,7 @@ class SteamGameAnalyzer:
         }
         
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_api(endpoint, params, self.steam_id, force_refresh)
             
             if 'response' in data and 'players' in data['response'] and data['response']['players']:
                 return data['response']['players'][0]
@@ -82,64 +871,253 @@ class SteamGameAnalyzer:
             print(f"请求错误: {e}")
             return None
     
+    def get_friend_list(self, force_refresh=False):
+        """获取好友的Steam ID列表，好友列表不公开或请求失败时返回空列表"""
+        endpoint = "ISteamUser/GetFriendList/v1/"
+        params = {
+            'key': self.api_key,
+            'steamid': self.steam_id,
+            'relationship': 'friend',
+            'format': 'json'
+        }
+        
+        try:
+            data = self._get_api(endpoint, params, self.steam_id, force_refresh)
+        except requests.exceptions.HTTPError as e:
+            # 好友列表设为不公开时接口返回401
+            if e.response is not None and e.response.status_code == 401:
+                print("好友列表不公开，无法获取")
+            else:
+                print(f"请求错误: {e}")
+            return []
+        except requests.exceptions.RequestException as e:
+            print(f"请求错误: {e}")
+            return []
+        
+        friends = data.get('friendslist', {}).get('friends', [])
+        return [friend['steamid'] for friend in friends if 'steamid' in friend]
+    
+    def _fetch_app_details(self, appid, limiter):
+        """获取单个游戏的类型、发行日期和是否免费，商店中不存在时返回None"""
+        data = self._request_json(f"{self.store_url}/appdetails",
+                                  {'appids': appid, 'filters': 'basic,genres,release_date'}, limiter)
+        entry = (data or {}).get(str(appid)) or {}
+        if not entry.get('success') or not isinstance(entry.get('data'), dict):
+            return None
+        info = entry['data']
+        return {
+            'genres': [genre.get('description') for genre in info.get('genres', []) if genre.get('description')],
+            'release_date': (info.get('release_date') or {}).get('date') or None,
+            'is_free': bool(info.get('is_free')),
+        }
+    
+    def _fetch_app_prices(self, appids, limiter):
+        """批量获取多个游戏的价格，免费或商店中不存在的游戏对应None"""
+        data = self._request_json(f"{self.store_url}/appdetails",
+                                  {'appids': ','.join(str(appid) for appid in appids), 'filters': 'price_overview'},
+                                  limiter) or {}
+        prices = {}
+        for appid in appids:
+            entry = data.get(str(appid)) or {}
+            # 免费游戏的data为空列表
+            overview = entry.get('data').get('price_overview') if isinstance(entry.get('data'), dict) else None
+            prices[appid] = {
+                'final': overview.get('final', 0) / 100,
+                'initial': overview.get('initial', 0) / 100,
+                'currency': overview.get('currency'),
+            } if overview else None
+        return prices
+    
+    def _fetch_achievements(self, appid):
+        """获取当前用户在某个游戏中的成就完成情况，返回(成就总数, 已解锁数)，没有成就统计时返回(None, None)"""
+        params = {'key': self.api_key, 'steamid': self.steam_id, 'appid': appid}
+        try:
+            data = self._request_json(f"{self.base_url}/ISteamUserStats/GetPlayerAchievements/v1/", params)
+        except requests.exceptions.HTTPError as e:
+            # 没有成就统计的游戏返回400，隐私设置不允许查看时返回403
+            if e.response is not None and e.response.status_code in (400, 403):
+                return None, None
+            raise
+        achievements = (data.get('playerstats') or {}).get('achievements') or []
+        return len(achievements), sum(1 for item in achievements if item.get('achieved'))
+    
+    def _run_enrich_tasks(self, executor, func, items, store_batch, batch_size=50):
+        """并发执行func(item)，每完成batch_size个结果写入一次缓存；单个请求失败只跳过该项，返回失败数量"""
+        pending = {}
+        failed = 0
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                pending.update(future.result())
+            except (requests.exceptions.RequestException, ValueError) as e:
+                failed += 1
+                print(f"获取游戏信息失败({futures[future]}): {e}")
+            if len(pending) >= batch_size:
+                store_batch(pending)
+                pending = {}
+        if pending:
+            store_batch(pending)
+        return failed
+    
+    def enrich_games(self, games, achievements=True, limit=None, max_workers=DEFAULT_ENRICH_WORKERS,
+                     force_refresh=False, store_rate_limiter=None):
+        """补充游戏的商店信息(类型、发行日期、价格)和成就完成度，返回以appid为索引的DataFrame
+
+        这是可选的补充步骤：每款游戏都需要单独请求，首次运行较慢，结果按appid缓存在GameMetadataStore中，
+        类型等信息30天、价格1天内不会重复请求，成就只在游玩时长变化后重新获取。
+        limit只补充游玩时长最多的前limit款游戏；商店接口使用单独的限流器store_rate_limiter。
+        返回结果可以通过df.join(result, on='appid')合并到游戏表格中。
+        """
+        if self.metadata is None:
+            self.metadata = GameMetadataStore()
+        store = self.metadata
+        limiter = store_rate_limiter or TokenBucket(DEFAULT_STORE_RATE, DEFAULT_STORE_BURST)
+        
+        playtimes = {}
+        for game in sorted(games, key=lambda game: game.get('playtime_forever', 0), reverse=True):
+            if 'appid' in game:
+                playtimes.setdefault(game['appid'], game.get('playtime_forever', 0))
+        if limit is not None:
+            playtimes = dict(list(playtimes.items())[:limit])
+        appids = list(playtimes)
+        
+        with self._stage('补充游戏信息'), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            failed = 0
+            with self._stage('商店信息'):
+                details = {} if force_refresh else store.get_details(appids)
+                missing = [appid for appid in appids if appid not in details]
+                if missing:
+                    print(f"正在获取 {len(missing)} 款游戏的商店信息...")
+                    def store_details(batch):
+                        store.put_details(batch)
+                        details.update(batch)
+                    failed += self._run_enrich_tasks(
+                        executor, lambda appid: {appid: self._fetch_app_details(appid, limiter)}, missing, store_details)
+            
+            with self._stage('价格'):
+                prices = {} if force_refresh else store.get_prices(appids)
+                missing = [appid for appid in appids if appid not in prices]
+                batches = [missing[i:i + PRICE_BATCH_SIZE] for i in range(0, len(missing), PRICE_BATCH_SIZE)]
+                def store_prices(batch):
+                    store.put_prices(batch)
+                    prices.update(batch)
+                failed += self._run_enrich_tasks(
+                    executor, lambda batch: self._fetch_app_prices(batch, limiter), batches, store_prices, batch_size=1)
+            
+            unlocked = {}
+            if achievements:
+                with self._stage('成就'):
+                    # 未游玩的游戏不会有已解锁的成就，无需请求
+                    played = {appid: playtime for appid, playtime in playtimes.items() if playtime > 0}
+                    unlocked = {} if force_refresh else store.get_achievements(self.steam_id, played)
+                    missing = [appid for appid in played if appid not in unlocked]
+                    if missing:
+                        print(f"正在获取 {len(missing)} 款游戏的成就...")
+                    def store_achievements(batch):
+                        store.put_achievements(self.steam_id, {
+                            appid: (played[appid], total, done) for appid, (total, done) in batch.items()})
+                        unlocked.update(batch)
+                    failed += self._run_enrich_tasks(
+                        executor, lambda appid: {appid: self._fetch_achievements(appid)}, missing, store_achievements)
+            
+            if failed:
+                print(f"有 {failed} 次请求失败，对应游戏的信息将在下次运行时重新获取")
+        
+        rows = []
+        for appid in appids:
+            info = details.get(appid) or {}
+            price = prices.get(appid) or {}
+            total, done = unlocked.get(appid, (None, None))
+            rows.append((appid, '、'.join(info.get('genres', [])) or None, info.get('release_date'),
+                         info.get('is_free'), price.get('final'), price.get('currency'), total, done))
+        result = pd.DataFrame(rows, columns=['appid', '类型', '发行日期', '是否免费', '价格', '货币', '成就总数', '已解锁成就'])
+        result['是否免费'] = result['是否免费'].astype('boolean')
+        result['成就总数'] = result['成就总数'].astype('Int64')
+        result['已解锁成就'] = result['已解锁成就'].astype('Int64')
+        result['成就完成度'] = (result['已解锁成就'] / result['成就总数'].where(result['成就总数'] > 0)).astype('Float64')
+        return result.set_index('appid')
+    
     def format_playtime(self, minutes):
         """将分钟转换为小时格式，保留一位小数"""
         hours = minutes / 60
         return f"{hours:.1f}小时"
     
-    def display_games_table(self, games):
-        """以表格形式显示游戏信息"""
+    def display_games_table(self, games, output='full', top_n=DEFAULT_TABLE_TOP_N, chunk_size=TABLE_CHUNK_SIZE):
+        """构建游戏表格并按output指定的方式输出，返回DataFrame
+
+        output为TABLE_OUTPUT_MODES之一：'full'逐块输出全部游戏，'top'只输出前top_n款，
+        'summary'只输出统计摘要（适合批量任务），'quiet'不输出（适合只需要DataFrame的界面调用）。
+        """
+        if output not in TABLE_OUTPUT_MODES:
+            raise ValueError(f"未知的表格输出方式: {output}，可选: {', '.join(TABLE_OUTPUT_MODES)}")
+        
         if not games:
-            print("没有游戏数据可显示")
+            if output != 'quiet':
+                print("没有游戏数据可显示")
             return pd.DataFrame()  # 返回空DataFrame
         
-        # 验证游戏数据格式
-        validated_games = []
-        for game in games:
-            # 确保必要的字段存在
-            if 'name' in game and 'playtime_forever' in game:
-                validated_games.append(game)
-            else:
-                print(f"警告: 跳过格式不正确的游戏数据: {game}")
-        
-        if not validated_games:
-            print("没有有效的游戏数据可显示")
+        # 校验并构建DataFrame
+        with self._stage('构建表格'):
+            df = build_games_frame(games)
+        if df.empty:
+            if output != 'quiet':
+                print("没有有效的游戏数据可显示")
             return pd.DataFrame()  # 返回空DataFrame
         
-        # 创建DataFrame
-        df = pd.DataFrame(validated_games)
+        # 显示表格：逐块格式化并立即输出，避免把整个游戏库拼成一个巨大的字符串
+        if output != 'quiet':
+            with self._stage('输出表格'):
+                if output == 'summary':
+                    print("\n用户游戏库摘要:")
+                    print(summarize_games_frame(df))
+                else:
+                    limit = top_n if output == 'top' else None
+                    title = f"前{min(top_n, len(df))}款游戏" if output == 'top' else "用户游戏库及游玩时长"
+                    print(f"\n{title}:")
+                    for chunk in iter_table_chunks(df, chunk_size, limit):
+                        print(chunk, flush=True)
         
-        # 选择需要的列
-        if 'name' in df.columns and 'playtime_forever' in df.columns:
-            df = df[['name', 'playtime_forever']]
-            
-            # 重命名列
-            df.columns = ['游戏名称', '游玩时长(分钟)']
-            
-            # 添加以小时为单位的游玩时长列
-            df['游玩时长(小时)'] = df['游玩时长(分钟)'] / 60
-            df['游玩时长'] = df['游玩时长(分钟)'].apply(self.format_playtime)
-            
-            # 添加是否游玩过的标记
-            df['是否游玩'] = df['游玩时长(分钟)'] > 0
-            
-            # 按游玩时长排序
-            df = df.sort_values('游玩时长(小时)', ascending=False)
-            
-            # 重置索引
-            df = df.reset_index(drop=True)
-            
-            # 显示表格
-            print("\n用户游戏库及游玩时长:")
-            print(df.to_string(index=False))
-            
-            return df
-        else:
-            print("游戏数据缺少必要字段")
-            return pd.DataFrame()  # 返回空DataFrame
+        return df
     
-    def generate_charts(self, df):
-        """生成分析图表"""
+    def export_games(self, df, path, fmt=None, append=False):
+        """把游戏表格逐块导出为CSV、JSON Lines或Parquet文件，返回写入的行数
+
+        fmt省略时根据扩展名判断；append为True时追加到已有数据（Parquet为数据集目录），详见GameDataExporter。
+        """
+        with self._stage('导出数据'):
+            with GameDataExporter(path, fmt, append) as exporter:
+                return exporter.write(games_export_frame(df, self.steam_id))
+    
+    def analyze(self, df):
+        """按当前的分组规则计算游戏库的全部统计结果，返回AnalysisResult"""
+        return AnalysisResult(df, self.playtime_groups, self.play_status)
+    
+    def _chart_rc(self):
+        """渲染图表时使用的matplotlib样式：seaborn whitegrid风格加中文字体"""
+        _, sns = _import_pyplot()
+        rc = dict(sns.axes_style("whitegrid"))
+        rc['axes.unicode_minus'] = False
+        # 如果没有找到中文字体，尝试使用系统中的任何字体
+        rc['font.sans-serif'] = [resolve_chart_font(self.font_path) or 'sans-serif']
+        return rc
+    
+    def _chart_cache_key(self, df, profile, username):
+        """图表缓存键：输入数据内容 + 渲染配置 + 用户名 + 分组规则 + 字体"""
+        data_hash = hash_dataframe(df, ['游戏名称', '游玩时长(分钟)'])
+        buckets = [(list(b.edges), b.labels, b.zero_label) for b in (self.playtime_groups, self.play_status)]
+        font = resolve_chart_font(self.font_path)
+        raw = json.dumps([data_hash, list(profile), username, buckets, font], ensure_ascii=False, default=float)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def generate_charts(self, df, profile=DEFAULT_RENDER_PROFILE, to_buffer=False, result=None):
+        """生成分析图表并保存，返回图表文件名
+
+        profile为RENDER_PROFILES中的名称或RenderProfile，决定分辨率和输出格式：
+        交互预览用'preview'，需要打印或存档时用'print'或矢量格式'svg'/'pdf'。
+        to_buffer为True时不写入文件，返回包含图像数据的BytesIO，用于在界面中直接预览。
+        result为已经由analyze(df)计算好的AnalysisResult，省略时在这里计算。不会修改df。
+        """
+        profile = get_render_profile(profile)
         if df.empty:
             print("没有数据可生成图表")
             return
@@ -149,11 +1127,11 @@ class SteamGameAnalyzer:
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             print(f"警告: 缺少必要的列: {missing_columns}")
-            # 尝试添加缺失的列
+            # 尝试补充缺失的列（在副本上补充，不修改调用方的DataFrame）
             if '游玩时长(小时)' not in df.columns and '游玩时长(分钟)' in df.columns:
-                df['游玩时长(小时)'] = df['游玩时长(分钟)'] / 60
+                df = df.assign(**{'游玩时长(小时)': df['游玩时长(分钟)'] / 60})
             if '是否游玩' not in df.columns and '游玩时长(分钟)' in df.columns:
-                df['是否游玩'] = df['游玩时长(分钟)'] > 0
+                df = df.assign(是否游玩=df['游玩时长(分钟)'] > 0)
             # 检查是否仍有缺失的列
             missing_columns = [col for col in required_columns if col not in df.columns]
             if missing_columns:
@@ -161,522 +1139,396 @@ class SteamGameAnalyzer:
                 return
         
         # 获取玩家信息
-        player_summary = self.get_player_summary()
+        with self._stage('获取玩家信息'):
+            player_summary = self.get_player_summary()
         username = player_summary.get('personaname', '未知用户') if player_summary else '未知用户'
         
-        # 设置中文字体和样式，使用多种字体确保兼容性
-        plt.rcParams['axes.unicode_minus'] = False
-        sns.set_style("whitegrid")
-        
-        # 检测系统并设置合适的字体
-        import platform
-        import matplotlib.font_manager as fm
-        
-        system = platform.system()
-        if system == "Windows":
-            chinese_fonts = ['SimHei', 'Microsoft YaHei', 'SimSun', 'FangSong']
-        elif system == "Darwin":  # macOS
-            chinese_fonts = ['Arial Unicode MS', 'Heiti SC']
-        else:  # Linux and others
-            chinese_fonts = ['WenQuanYi Micro Hei', 'DejaVu Sans', 'Bitstream Vera Sans']
-        
-        # 检查可用字体并设置
-        available_fonts = set(f.name for f in fm.fontManager.ttflist)
-        chinese_font = None
-        
-        for font in chinese_fonts:
-            if font in available_fonts:
-                chinese_font = font
-                break
-        
-        # 如果找到了中文字体，则设置
-        if chinese_font:
-            plt.rcParams['font.sans-serif'] = [chinese_font]
-        else:
-            # 如果没有找到中文字体，尝试使用系统中的任何字体
-            plt.rcParams['font.sans-serif'] = ['sans-serif']
+        # 数据、渲染配置和用户名都未变化时，直接返回之前渲染好的图表
+        cache_key = None
+        if self.chart_cache:
+            with self._stage('查询图表缓存'):
+                cache_key = self._chart_cache_key(df, profile, username)
+                cached_path = self.chart_cache.get(cache_key, profile.fmt)
+            if cached_path:
+                print(f"\n数据未变化，使用已缓存的图表: {cached_path}")
+                if to_buffer:
+                    with open(cached_path, 'rb') as f:
+                        return io.BytesIO(f.read())
+                return cached_path
+        
+        # 所有图表需要的统计量只计算一次
+        if result is None:
+            with self._stage('计算统计量'):
+                result = self.analyze(df)
+        
+        # 字体和样式只在渲染期间通过rc_context生效，并与其他线程的渲染串行执行，不会竞争修改全局rcParams
+        with self._stage('准备渲染'):
+            plt, _ = _import_pyplot()
+            rc = self._chart_rc()
+        with _render_lock, plt.rc_context(rc), self._stage('渲染图表'):
+            try:
+                return self._render_charts(result, profile, username, cache_key, to_buffer)
+            except BaseException:
+                # 渲染中途出错或被取消时关闭尚未保存的画布，渲染锁保证此时没有其他线程在绘图
+                plt.close('all')
+                raise
+    
+    def _render_charts(self, result, profile, username, cache_key, to_buffer=False):
+        """根据AnalysisResult在当前样式下绘制全部图表并保存，返回文件名（to_buffer为True时返回BytesIO）
+
+        各个图表只读取result中预先算好的统计量，不再各自对DataFrame做排序和聚合。
+        """
+        plt, sns = _import_pyplot()
         
         # 使用更现代的颜色调色板
         colors = sns.color_palette("viridis", 15)
         
         # 创建图表
-        fig, axes = plt.subplots(3, 3, figsize=(24, 22))
-        fig.suptitle(f'{username}的Steam游戏数据分析', fontsize=22, fontweight='bold', y=0.98)
+        with self._stage('创建画布'):
+            fig, axes = plt.subplots(3, 3, figsize=(24, 22))
+            fig.suptitle(f'{username}的Steam游戏数据分析', fontsize=22, fontweight='bold', y=0.98)
         
         # 1. 游戏时长分布直方图
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 使用动态bins
-            max_hours = df['游玩时长(小时)'].max()
-            if max_hours <= 10:
-                # 对于较小的时长，使用更细的区间
-                bins = [0, 1, 2, 5, 10]
-            elif max_hours <= 20:
-                # 中等时长范围
-                bins = [0, 1, 5, 10, 15, 20]
-            elif max_hours <= 50:
-                # 中等时长范围
-                bins = [0, 5, 10, 20, 30, 40, 50]
-            elif max_hours <= 100:
-                # 较大时长范围
-                bins = [0, 10, 20, 30, 50, 75, 100]
-            elif max_hours <= 300:
-                # 更大的时长范围
-                bins = [0, 20, 50, 100, 150, 200, 250, 300]
-            else:
-                # 很大的时长范围
-                bins = [0, 50, 100, 200, 300, 500, 800, 1200]
-            
-            # 检查是否有足够的数据生成图表
-            if len(df['游玩时长(小时)']) == 0:
-                raise ValueError("没有足够的数据生成游戏时长分布直方图")
-            
-            n, bins, patches = axes[0, 0].hist(df['游玩时长(小时)'], bins=bins, color=colors[0], edgecolor='white', linewidth=1.2, alpha=0.8)
-            axes[0, 0].set_title('游戏时长分布', fontsize=16, fontweight='bold', pad=15)
-            axes[0, 0].set_xlabel('游玩时长(小时)', fontsize=13)
-            axes[0, 0].set_ylabel('游戏数量', fontsize=13)
-            axes[0, 0].grid(True, alpha=0.4)
-            
-            # 添加统计信息
-            mean_hours = df['游玩时长(小时)'].mean()
-            median_hours = df['游玩时长(小时)'].median()
-            std_hours = df['游玩时长(小时)'].std()
-            axes[0, 0].axvline(mean_hours, color='#e74c3c', linestyle='--', linewidth=2, label=f'平均值: {mean_hours:.1f}小时')
-            axes[0, 0].axvline(median_hours, color='#3498db', linestyle='-.', linewidth=2, label=f'中位数: {median_hours:.1f}小时')
-            axes[0, 0].legend(loc='upper right', frameon=True, fancybox=True, shadow=True)
-            
-            # 添加更多统计信息
-            axes[0, 0].text(0.03, 0.97, f'标准差: {std_hours:.1f}小时', 
-                           transform=axes[0, 0].transAxes, fontsize=11,
-                           verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成游戏时长分布直方图时出错: {e}")
-            axes[0, 0].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[0, 0].transAxes, fontsize=14, fontweight='bold')
-            axes[0, 0].set_title('游戏时长分布', fontsize=16, fontweight='bold', pad=15)
-            axes[0, 0].axis('off')
+        with self._stage('游戏时长分布直方图'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成游戏时长分布直方图")
+            
+                n, bins, patches = axes[0, 0].hist(result.hours, bins=result.histogram_bins, color=colors[0], edgecolor='white', linewidth=1.2, alpha=0.8)
+                axes[0, 0].set_title('游戏时长分布', fontsize=16, fontweight='bold', pad=15)
+                axes[0, 0].set_xlabel('游玩时长(小时)', fontsize=13)
+                axes[0, 0].set_ylabel('游戏数量', fontsize=13)
+                axes[0, 0].grid(True, alpha=0.4)
+            
+                # 添加统计信息
+                axes[0, 0].axvline(result.mean_hours, color='#e74c3c', linestyle='--', linewidth=2, label=f'平均值: {result.mean_hours:.1f}小时')
+                axes[0, 0].axvline(result.median_hours, color='#3498db', linestyle='-.', linewidth=2, label=f'中位数: {result.median_hours:.1f}小时')
+                axes[0, 0].legend(loc='upper right', frameon=True, fancybox=True, shadow=True)
+            
+                # 添加更多统计信息
+                axes[0, 0].text(0.03, 0.97, f'标准差: {result.std_hours:.1f}小时', 
+                               transform=axes[0, 0].transAxes, fontsize=11,
+                               verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
+                               fontweight='bold')
+            except Exception as e:
+                print(f"生成游戏时长分布直方图时出错: {e}")
+                axes[0, 0].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[0, 0].transAxes, fontsize=14, fontweight='bold')
+                axes[0, 0].set_title('游戏时长分布', fontsize=16, fontweight='bold', pad=15)
+                axes[0, 0].axis('off')
         
         # 2. 游戏时长前10名条形图
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成游玩时长前10名游戏条形图")
-            
-            top_10 = df.head(10)
-            bars = axes[0, 1].barh(top_10['游戏名称'], top_10['游玩时长(小时)'], color=colors[1], edgecolor='white', linewidth=0.7, alpha=0.9)
-            axes[0, 1].set_title('游玩时长前10名游戏', fontsize=16, fontweight='bold', pad=15)
-            axes[0, 1].set_xlabel('游玩时长(小时)', fontsize=13)
-            axes[0, 1].grid(True, axis='x', alpha=0.4)
-            
-            # 在条形图上添加数值标签
-            total_hours = df['游玩时长(小时)'].sum()
-            total_games = len(df)
-            for i, (bar, hours) in enumerate(zip(bars, top_10['游玩时长(小时)'])):
-                percentage = (hours / total_hours) * 100
-                axes[0, 1].text(bar.get_width() + max(top_10['游玩时长(小时)']) * 0.01, 
-                               bar.get_y() + bar.get_height()/2, 
-                               f'{hours:.1f}小时 ({percentage:.1f}%)', 
-                               va='center', ha='left', fontsize=11, fontweight='bold', color='#2c3e50')
-            
-            # 添加总游戏数信息
-            axes[0, 1].text(0.97, 0.97, f'总游戏数: {total_games}', 
-                           transform=axes[0, 1].transAxes, fontsize=11,
-                           verticalalignment='top', horizontalalignment='right',
-                           bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成游玩时长前10名游戏条形图时出错: {e}")
-            axes[0, 1].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[0, 1].transAxes, fontsize=14, fontweight='bold')
-            axes[0, 1].set_title('游玩时长前10名游戏', fontsize=16, fontweight='bold', pad=15)
-            axes[0, 1].axis('off')
+        with self._stage('游戏时长前10名条形图'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成游玩时长前10名游戏条形图")
+            
+                bars = axes[0, 1].barh(result.top_names, result.top_hours, color=colors[1], edgecolor='white', linewidth=0.7, alpha=0.9)
+                axes[0, 1].set_title('游玩时长前10名游戏', fontsize=16, fontweight='bold', pad=15)
+                axes[0, 1].set_xlabel('游玩时长(小时)', fontsize=13)
+                axes[0, 1].grid(True, axis='x', alpha=0.4)
+            
+                # 在条形图上添加数值标签
+                for bar, hours, percentage in zip(bars, result.top_hours, result.top_percentages):
+                    axes[0, 1].text(bar.get_width() + result.top_hours.max() * 0.01, 
+                                   bar.get_y() + bar.get_height()/2, 
+                                   f'{hours:.1f}小时 ({percentage:.1f}%)', 
+                                   va='center', ha='left', fontsize=11, fontweight='bold', color='#2c3e50')
+            
+                # 添加总游戏数信息
+                axes[0, 1].text(0.97, 0.97, f'总游戏数: {result.total_games}', 
+                               transform=axes[0, 1].transAxes, fontsize=11,
+                               verticalalignment='top', horizontalalignment='right',
+                               bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
+                               fontweight='bold')
+            except Exception as e:
+                print(f"生成游玩时长前10名游戏条形图时出错: {e}")
+                axes[0, 1].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[0, 1].transAxes, fontsize=14, fontweight='bold')
+                axes[0, 1].set_title('游玩时长前10名游戏', fontsize=16, fontweight='bold', pad=15)
+                axes[0, 1].axis('off')
         
         # 3. 游戏时长饼图(前10名和其他)
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成游戏时长占比饼图")
-            
-            top_10_pie = df.head(10)
-            others_time = df.iloc[10:]['游玩时长(小时)'].sum()
-            
-            pie_data = list(top_10_pie['游玩时长(小时)'])
-            pie_labels = list(top_10_pie['游戏名称'])
-            
-            if others_time > 0:
-                pie_data.append(others_time)
-                pie_labels.append('其他游戏')
-            
-            wedges, texts, autotexts = axes[1, 0].pie(pie_data, labels=pie_labels, autopct='%1.1f%%', startangle=90, 
-                          colors=colors[2:2+len(pie_data)], shadow=True, explode=[0.08]*len(pie_data),
-                          textprops={'fontsize': 11, 'fontweight': 'bold'},
-                          wedgeprops={'edgecolor': 'white', 'linewidth': 1.5})
-            
-            # 设置百分比标签样式
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-                autotext.set_fontsize(10)
-            
-            axes[1, 0].set_title('游戏时长占比(前10名及其它)', fontsize=16, fontweight='bold', pad=20)
-        except Exception as e:
-            print(f"生成游戏时长占比饼图时出错: {e}")
-            axes[1, 0].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[1, 0].transAxes, fontsize=14, fontweight='bold')
-            axes[1, 0].set_title('游戏时长占比(前10名及其它)', fontsize=16, fontweight='bold', pad=20)
-            axes[1, 0].axis('off')
+        with self._stage('游戏时长饼图(前10名和其他)'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成游戏时长占比饼图")
+            
+                pie_data = list(result.top_hours)
+                pie_labels = list(result.top_names)
+            
+                if result.others_hours > 0:
+                    pie_data.append(result.others_hours)
+                    pie_labels.append('其他游戏')
+            
+                wedges, texts, autotexts = axes[1, 0].pie(pie_data, labels=pie_labels, autopct='%1.1f%%', startangle=90, 
+                              colors=colors[2:2+len(pie_data)], shadow=True, explode=[0.08]*len(pie_data),
+                              textprops={'fontsize': 11, 'fontweight': 'bold'},
+                              wedgeprops={'edgecolor': 'white', 'linewidth': 1.5})
+            
+                # 设置百分比标签样式
+                for autotext in autotexts:
+                    autotext.set_color('white')
+                    autotext.set_fontweight('bold')
+                    autotext.set_fontsize(10)
+            
+                axes[1, 0].set_title('游戏时长占比(前10名及其它)', fontsize=16, fontweight='bold', pad=20)
+            except Exception as e:
+                print(f"生成游戏时长占比饼图时出错: {e}")
+                axes[1, 0].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[1, 0].transAxes, fontsize=14, fontweight='bold')
+                axes[1, 0].set_title('游戏时长占比(前10名及其它)', fontsize=16, fontweight='bold', pad=20)
+                axes[1, 0].axis('off')
         
         # 4. 累计游戏时长图
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成累计游戏时长图")
-            
-            df_sorted = df.sort_values('游玩时长(小时)', ascending=False).reset_index(drop=True)
-            df_sorted['累计时长'] = df_sorted['游玩时长(小时)'].cumsum()
-            
-            # 检查排序后的数据是否为空
-            if len(df_sorted) == 0:
-                raise ValueError("没有足够的数据生成累计游戏时长图")
-            
-            axes[1, 1].plot(df_sorted.index, df_sorted['累计时长'], marker='o', markersize=5, 
-                           linewidth=2.5, color=colors[3], markerfacecolor='#e74c3c', markeredgecolor='darkred',
-                           alpha=0.8)
-            axes[1, 1].set_title('累计游戏时长', fontsize=16, fontweight='bold', pad=20)
-            axes[1, 1].set_xlabel('游戏排序', fontsize=13)
-            axes[1, 1].set_ylabel('累计时长(小时)', fontsize=13)
-            axes[1, 1].grid(True, alpha=0.4)
-            
-            # 添加统计信息
-            total_hours = df['游玩时长(小时)'].sum()
-            axes[1, 1].text(0.03, 0.97, f'总时长: {total_hours:.1f}小时', 
-                           transform=axes[1, 1].transAxes, fontsize=11,
-                           verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成累计游戏时长图时出错: {e}")
-            axes[1, 1].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[1, 1].transAxes, fontsize=14, fontweight='bold')
-            axes[1, 1].set_title('累计游戏时长', fontsize=16, fontweight='bold', pad=20)
-            axes[1, 1].axis('off')
+        with self._stage('累计游戏时长图'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成累计游戏时长图")
+            
+                axes[1, 1].plot(np.arange(result.total_games), result.cumulative_hours, marker='o', markersize=5, 
+                               linewidth=2.5, color=colors[3], markerfacecolor='#e74c3c', markeredgecolor='darkred',
+                               alpha=0.8)
+                axes[1, 1].set_title('累计游戏时长', fontsize=16, fontweight='bold', pad=20)
+                axes[1, 1].set_xlabel('游戏排序', fontsize=13)
+                axes[1, 1].set_ylabel('累计时长(小时)', fontsize=13)
+                axes[1, 1].grid(True, alpha=0.4)
+            
+                # 添加统计信息
+                axes[1, 1].text(0.03, 0.97, f'总时长: {result.total_hours:.1f}小时', 
+                               transform=axes[1, 1].transAxes, fontsize=11,
+                               verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
+                               fontweight='bold')
+            except Exception as e:
+                print(f"生成累计游戏时长图时出错: {e}")
+                axes[1, 1].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[1, 1].transAxes, fontsize=14, fontweight='bold')
+                axes[1, 1].set_title('累计游戏时长', fontsize=16, fontweight='bold', pad=20)
+                axes[1, 1].axis('off')
         
         # 5. 未玩游戏与已玩游戏对比
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成未玩游戏与已玩游戏对比图表")
-            
-            not_played = df[df['游玩时长(小时)'] == 0]
-            played = df[df['游玩时长(小时)'] > 0]
-            
-            categories = ['未玩游戏', '已玩游戏']
-            counts = [len(not_played), len(played)]
-            
-            bars = axes[1, 2].bar(categories, counts, color=[colors[4], colors[5]], edgecolor='white', linewidth=1.2, alpha=0.9)
-            axes[1, 2].set_title('未玩游戏与已玩游戏对比', fontsize=16, fontweight='bold', pad=20)
-            axes[1, 2].set_ylabel('游戏数量', fontsize=13)
-            axes[1, 2].grid(True, axis='y', alpha=0.4)
-            
-            # 在条形图上添加数值标签
-            for bar, count in zip(bars, counts):
-                height = bar.get_height()
-                axes[1, 2].text(bar.get_x() + bar.get_width()/2., height + max(counts)*0.01,
-                               f'{count}', ha='center', va='bottom', fontsize=13, fontweight='bold', color='#2c3e50')
-            
-            # 添加百分比信息
-            total_games = len(df)
-            if total_games > 0:
-                played_percentage = (len(played) / total_games) * 100
-                axes[1, 2].text(0.97, 0.97, f'游玩率: {played_percentage:.1f}%', 
-                               transform=axes[1, 2].transAxes, fontsize=11,
+        with self._stage('未玩游戏与已玩游戏对比'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成未玩游戏与已玩游戏对比图表")
+            
+                categories = ['未玩游戏', '已玩游戏']
+                counts = [result.unplayed_count, result.played_count]
+            
+                bars = axes[1, 2].bar(categories, counts, color=[colors[4], colors[5]], edgecolor='white', linewidth=1.2, alpha=0.9)
+                axes[1, 2].set_title('未玩游戏与已玩游戏对比', fontsize=16, fontweight='bold', pad=20)
+                axes[1, 2].set_ylabel('游戏数量', fontsize=13)
+                axes[1, 2].grid(True, axis='y', alpha=0.4)
+            
+                # 在条形图上添加数值标签
+                for bar, count in zip(bars, counts):
+                    height = bar.get_height()
+                    axes[1, 2].text(bar.get_x() + bar.get_width()/2., height + max(counts)*0.01,
+                                   f'{count}', ha='center', va='bottom', fontsize=13, fontweight='bold', color='#2c3e50')
+            
+                # 添加百分比信息
+                if result.total_games > 0:
+                    axes[1, 2].text(0.97, 0.97, f'游玩率: {result.played_ratio * 100:.1f}%', 
+                                   transform=axes[1, 2].transAxes, fontsize=11,
+                                   verticalalignment='top', horizontalalignment='right',
+                                   bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
+                                   fontweight='bold')
+            except Exception as e:
+                print(f"生成未玩游戏与已玩游戏对比图表时出错: {e}")
+                axes[1, 2].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[1, 2].transAxes, fontsize=14, fontweight='bold')
+                axes[1, 2].set_title('未玩游戏与已玩游戏对比', fontsize=16, fontweight='bold', pad=20)
+                axes[1, 2].axis('off')
+        
+        # 6. 游戏时长分组柱状图
+        with self._stage('游戏时长分组柱状图'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成游戏时长分组柱状图")
+            
+                # 按照时长分组定义的顺序排序，而不是按游戏数量排序
+                playtime_groups = result.group_counts
+            
+                # 检查分组数据是否为空
+                if len(playtime_groups) == 0 or playtime_groups.sum() == 0:
+                    raise ValueError("没有足够的数据生成游戏时长分组柱状图")
+            
+                bars = axes[2, 0].bar(playtime_groups.index, playtime_groups.values, 
+                                     color=colors[6], edgecolor='white', linewidth=1.2, alpha=0.9)
+                axes[2, 0].set_title('游戏时长分组', fontsize=16, fontweight='bold', pad=20)
+                axes[2, 0].set_ylabel('游戏数量', fontsize=13)
+                axes[2, 0].tick_params(axis='x', rotation=45)
+                axes[2, 0].grid(True, axis='y', alpha=0.4)
+            
+                # 在条形图上添加数值标签
+                for bar, count in zip(bars, playtime_groups.values):
+                    height = bar.get_height()
+                    axes[2, 0].text(bar.get_x() + bar.get_width()/2., height + max(playtime_groups.values)*0.01,
+                                   f'{count}', ha='center', va='bottom', fontsize=11, fontweight='bold', color='#2c3e50')
+            
+                # 添加统计信息
+                axes[2, 0].text(0.97, 0.97, f'总游戏数: {result.total_games}', 
+                               transform=axes[2, 0].transAxes, fontsize=11,
                                verticalalignment='top', horizontalalignment='right',
                                bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
                                fontweight='bold')
-        except Exception as e:
-            print(f"生成未玩游戏与已玩游戏对比图表时出错: {e}")
-            axes[1, 2].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[1, 2].transAxes, fontsize=14, fontweight='bold')
-            axes[1, 2].set_title('未玩游戏与已玩游戏对比', fontsize=16, fontweight='bold', pad=20)
-            axes[1, 2].axis('off')
-        
-        # 6. 游戏时长分组柱状图
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成游戏时长分组柱状图")
-            
-            # 定义游戏时长分组
-            def categorize_playtime(hours):
-                if hours == 0:
-                    return '未游玩'
-                elif hours < 10:
-                    return '1-10小时'
-                elif hours < 50:
-                    return '10-50小时'
-                elif hours < 100:
-                    return '50-100小时'
-                elif hours < 500:
-                    return '100-500小时'
-                else:
-                    return '500小时以上'
-            
-            df['时长分组'] = df['游玩时长(小时)'].apply(categorize_playtime)
-            # 按照时长分组定义的顺序排序，而不是按游戏数量排序
-            playtime_group_order = ['未游玩', '1-10小时', '10-50小时', '50-100小时', '100-500小时', '500小时以上']
-            playtime_groups = df['时长分组'].value_counts().reindex(playtime_group_order, fill_value=0)
-            
-            # 检查分组数据是否为空
-            if len(playtime_groups) == 0 or playtime_groups.sum() == 0:
-                raise ValueError("没有足够的数据生成游戏时长分组柱状图")
-            
-            bars = axes[2, 0].bar(playtime_groups.index, playtime_groups.values, 
-                                 color=colors[6], edgecolor='white', linewidth=1.2, alpha=0.9)
-            axes[2, 0].set_title('游戏时长分组', fontsize=16, fontweight='bold', pad=20)
-            axes[2, 0].set_ylabel('游戏数量', fontsize=13)
-            axes[2, 0].tick_params(axis='x', rotation=45)
-            axes[2, 0].grid(True, axis='y', alpha=0.4)
-            
-            # 在条形图上添加数值标签
-            for bar, count in zip(bars, playtime_groups.values):
-                height = bar.get_height()
-                axes[2, 0].text(bar.get_x() + bar.get_width()/2., height + max(playtime_groups.values)*0.01,
-                               f'{count}', ha='center', va='bottom', fontsize=11, fontweight='bold', color='#2c3e50')
-            
-            # 添加统计信息
-            axes[2, 0].text(0.97, 0.97, f'总游戏数: {total_games}', 
-                           transform=axes[2, 0].transAxes, fontsize=11,
-                           verticalalignment='top', horizontalalignment='right',
-                           bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成游戏时长分组图表时出错: {e}")
-            axes[2, 0].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[2, 0].transAxes, fontsize=14, fontweight='bold')
-            axes[2, 0].set_title('游戏时长分组', fontsize=16, fontweight='bold', pad=20)
-            axes[2, 0].axis('off')
+            except Exception as e:
+                print(f"生成游戏时长分组图表时出错: {e}")
+                axes[2, 0].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[2, 0].transAxes, fontsize=14, fontweight='bold')
+                axes[2, 0].set_title('游戏时长分组', fontsize=16, fontweight='bold', pad=20)
+                axes[2, 0].axis('off')
         
         # 7. 游戏时长与排名关系图
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成游戏时长与排名关系图")
-            
-            df_sorted_by_hours = df.sort_values('游玩时长(小时)', ascending=False).head(20).reset_index(drop=True)
-            
-            # 检查排序后的数据是否为空
-            if len(df_sorted_by_hours) == 0:
-                raise ValueError("没有足够的数据生成游戏时长与排名关系图")
-            
-            scatter = axes[2, 1].scatter(range(1, len(df_sorted_by_hours)+1), df_sorted_by_hours['游玩时长(小时)'], 
-                              color=colors[7], s=120, alpha=0.8, edgecolors='white', linewidth=1.5)
-            axes[2, 1].set_title('游戏时长与排名关系', fontsize=16, fontweight='bold', pad=20)
-            axes[2, 1].set_xlabel('排名', fontsize=13)
-            axes[2, 1].set_ylabel('游玩时长(小时)', fontsize=13)
-            axes[2, 1].grid(True, alpha=0.4)
-            
-            # 添加趋势线
-            x = range(1, len(df_sorted_by_hours)+1)
-            y = df_sorted_by_hours['游玩时长(小时)']
-            if len(x) > 1:
-                import numpy as np
-                z = np.polyfit(x, y, 1)
-                p = np.poly1d(z)
-                axes[2, 1].plot(x, p(x), "--", color='#e74c3c', linewidth=2.5, alpha=0.9)
-            
-            # 添加统计信息
-            total_games = len(df)
-            avg_hours = df['游玩时长(小时)'].mean()
-            std_hours = df['游玩时长(小时)'].std()
-            axes[2, 1].text(0.03, 0.97, f'总游戏数: {total_games}\n平均时长: {avg_hours:.1f}小时\n标准差: {std_hours:.1f}小时', 
-                           transform=axes[2, 1].transAxes, fontsize=11,
-                           verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成游戏时长与排名关系图时出错: {e}")
-            axes[2, 1].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[2, 1].transAxes, fontsize=14, fontweight='bold')
-            axes[2, 1].set_title('游戏时长与排名关系', fontsize=16, fontweight='bold', pad=20)
-            axes[2, 1].axis('off')
+        with self._stage('游戏时长与排名关系图'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成游戏时长与排名关系图")
+            
+                x = np.arange(1, len(result.rank_hours) + 1)
+                scatter = axes[2, 1].scatter(x, result.rank_hours, 
+                                  color=colors[7], s=120, alpha=0.8, edgecolors='white', linewidth=1.5)
+                axes[2, 1].set_title('游戏时长与排名关系', fontsize=16, fontweight='bold', pad=20)
+                axes[2, 1].set_xlabel('排名', fontsize=13)
+                axes[2, 1].set_ylabel('游玩时长(小时)', fontsize=13)
+                axes[2, 1].grid(True, alpha=0.4)
+            
+                # 添加趋势线
+                if result.rank_trend is not None:
+                    axes[2, 1].plot(x, np.poly1d(result.rank_trend)(x), "--", color='#e74c3c', linewidth=2.5, alpha=0.9)
+            
+                # 添加统计信息
+                axes[2, 1].text(0.03, 0.97, f'总游戏数: {result.total_games}\n平均时长: {result.mean_hours:.1f}小时\n标准差: {result.std_hours:.1f}小时', 
+                               transform=axes[2, 1].transAxes, fontsize=11,
+                               verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
+                               fontweight='bold')
+            except Exception as e:
+                print(f"生成游戏时长与排名关系图时出错: {e}")
+                axes[2, 1].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
+                               transform=axes[2, 1].transAxes, fontsize=14, fontweight='bold')
+                axes[2, 1].set_title('游戏时长与排名关系', fontsize=16, fontweight='bold', pad=20)
+                axes[2, 1].axis('off')
         
         # 移除游戏发布年份分布图，将该位置用于其他分析
         axes[2, 2].remove()
         
         # 9. 游戏时长与游玩状态关系图
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成游玩状态图表")
-            
-            # 定义游玩状态
-            def categorize_status(hours):
-                if hours == 0:
-                    return '未开始'
-                elif hours < 5:
-                    return '浅尝辄止'
-                elif hours < 20:
-                    return '适度游玩'
-                elif hours < 100:
-                    return '深度体验'
-                else:
-                    return '核心玩家'
-            
-            df['游玩状态'] = df['游玩时长(小时)'].apply(categorize_status)
-            status_counts = df['游玩状态'].value_counts()
-            
-            # 检查状态计数是否为空
-            if len(status_counts) == 0:
-                raise ValueError("没有足够的数据生成游玩状态图表")
-            
-            # 使用饼图展示
-            # 确保颜色索引不超出范围
-            color_start = 9
-            available_colors = len(colors)
-            color_indices = [i % available_colors for i in range(color_start, color_start + len(status_counts))]
-            selected_colors = [colors[i] for i in color_indices]
-            
-            wedges, texts, autotexts = axes[0, 2].pie(status_counts.values, labels=status_counts.index, autopct='%1.1f%%', 
-                          startangle=90, colors=selected_colors, 
-                          shadow=True, explode=[0.08]*len(status_counts),
-                          textprops={'fontsize': 11, 'fontweight': 'bold'},
-                          wedgeprops={'edgecolor': 'white', 'linewidth': 1.5})
-            
-            # 设置百分比标签样式
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-                autotext.set_fontsize(10)
-            
-            axes[0, 2].set_title('游戏游玩分类占比', fontsize=16, fontweight='bold', pad=20)
-            
-            # 添加统计信息
-            total_games = len(df)
-            axes[0, 2].text(0, -1.3, f'总游戏数: {total_games}', 
-                           ha='center', fontsize=12,
-                           bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成游戏游玩分类占比图时出错: {e}")
-            axes[0, 2].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', transform=axes[0, 2].transAxes, fontsize=14, fontweight='bold')
-            axes[0, 2].set_title('游戏游玩分类占比', fontsize=16, fontweight='bold', pad=20)
-            axes[0, 2].axis('off')
+        with self._stage('游戏时长与游玩状态关系图'):
+            try:
+                # 检查是否有足够的数据生成图表
+                if result.total_games == 0:
+                    raise ValueError("没有足够的数据生成游玩状态图表")
+            
+                # 按游戏数量从多到少排列，省略没有游戏的状态
+                status_counts = result.status_counts.sort_values(ascending=False, kind='stable')
+                status_counts = status_counts[status_counts > 0]
+            
+                # 检查状态计数是否为空
+                if len(status_counts) == 0:
+                    raise ValueError("没有足够的数据生成游玩状态图表")
+            
+                # 使用饼图展示
+                # 确保颜色索引不超出范围
+                color_start = 9
+                available_colors = len(colors)
+                color_indices = [i % available_colors for i in range(color_start, color_start + len(status_counts))]
+                selected_colors = [colors[i] for i in color_indices]
+            
+                wedges, texts, autotexts = axes[0, 2].pie(status_counts.values, labels=status_counts.index, autopct='%1.1f%%', 
+                              startangle=90, colors=selected_colors, 
+                              shadow=True, explode=[0.08]*len(status_counts),
+                              textprops={'fontsize': 11, 'fontweight': 'bold'},
+                              wedgeprops={'edgecolor': 'white', 'linewidth': 1.5})
+            
+                # 设置百分比标签样式
+                for autotext in autotexts:
+                    autotext.set_color('white')
+                    autotext.set_fontweight('bold')
+                    autotext.set_fontsize(10)
+            
+                axes[0, 2].set_title('游戏游玩分类占比', fontsize=16, fontweight='bold', pad=20)
+            
+                # 添加统计信息
+                axes[0, 2].text(0, -1.3, f'总游戏数: {result.total_games}', 
+                               ha='center', fontsize=12,
+                               bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
+                               fontweight='bold')
+            except Exception as e:
+                print(f"生成游戏游玩分类占比图时出错: {e}")
+                axes[0, 2].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', transform=axes[0, 2].transAxes, fontsize=14, fontweight='bold')
+                axes[0, 2].set_title('游戏游玩分类占比', fontsize=16, fontweight='bold', pad=20)
+                axes[0, 2].axis('off')
         
         # 可以在这里添加其他分析图表
         # 例如：游戏时长与游玩状态关系图的扩展分析
-        if '游玩状态' in df.columns:
-            status_counts = df['游玩状态'].value_counts()
-            if len(status_counts) > 0:
-                # 创建一个空的图表区域作为占位符
-                axes[2, 2] = fig.add_subplot(3, 3, 9)
-                axes[2, 2].text(0.5, 0.5, '更多分析图表\n敬请期待', ha='center', va='center', transform=axes[2, 2].transAxes, fontsize=14, fontweight='bold')
-                axes[2, 2].set_title('扩展分析', fontsize=16, fontweight='bold', pad=20)
-                axes[2, 2].axis('off')
-        try:
-            # 检查必要的数据是否存在
-            if '游玩时长(小时)' not in df.columns:
-                raise ValueError("缺少'游玩时长(小时)'列")
-            
-            # 检查是否有足够的数据生成图表
-            if len(df) == 0:
-                raise ValueError("没有足够的数据生成游玩状态图表")
-            
-            # 定义游玩状态
-            def categorize_status(hours):
-                if hours == 0:
-                    return '未开始'
-                elif hours < 5:
-                    return '浅尝辄止'
-                elif hours < 20:
-                    return '适度游玩'
-                elif hours < 100:
-                    return '深度体验'
+        if result.total_games > 0:
+            # 创建一个空的图表区域作为占位符
+            axes[2, 2] = fig.add_subplot(3, 3, 9)
+            axes[2, 2].text(0.5, 0.5, '更多分析图表\n敬请期待', ha='center', va='center', transform=axes[2, 2].transAxes, fontsize=14, fontweight='bold')
+            axes[2, 2].set_title('扩展分析', fontsize=16, fontweight='bold', pad=20)
+            axes[2, 2].axis('off')
+        
+        # 调整布局：tight_layout需要完整绘制一遍来测量文字尺寸，预览模式下直接使用固定边距
+        with self._stage('布局'):
+            if profile.tight_layout:
+                plt.tight_layout(pad=2.5)
+                fig.subplots_adjust(top=0.90, hspace=0.45, wspace=0.35, bottom=0.08)
+            else:
+                fig.subplots_adjust(top=0.90, hspace=0.45, wspace=0.35, bottom=0.08, left=0.06, right=0.97)
+        
+        # 保存图表（使用fig.savefig：pyplot.savefig保存后还会触发一次多余的完整重绘）
+        with self._stage('保存'):
+            def write(path):
+                fig.savefig(path, format=profile.fmt, dpi=profile.dpi, bbox_inches='tight' if profile.tight_bbox else None,
+                            facecolor='white', edgecolor='none')
+        
+            try:
+                if to_buffer:
+                    buffer = io.BytesIO()
+                    write(buffer)
+                    if cache_key:
+                        # 同样放入图表缓存，数据未变化时再次预览直接返回缓存的图像
+                        data = buffer.getvalue()
+                        def store(path):
+                            with open(path, 'wb') as f:
+                                f.write(data)
+                        self.chart_cache.store(cache_key, profile.fmt, store)
+                    buffer.seek(0)
+                    return buffer
+                if cache_key:
+                    filename = self.chart_cache.store(cache_key, profile.fmt, write)
                 else:
-                    return '核心玩家'
-            
-            df['游玩状态'] = df['游玩时长(小时)'].apply(categorize_status)
-            status_counts = df['游玩状态'].value_counts()
-            
-            # 检查状态计数是否为空
-            if len(status_counts) == 0:
-                raise ValueError("没有足够的数据生成游玩状态图表")
-            
-            # 使用饼图展示
-            wedges, texts, autotexts = axes[0, 2].pie(status_counts.values, labels=status_counts.index, autopct='%1.1f%%', 
-                          startangle=90, colors=colors[9:9+len(status_counts)], 
-                          shadow=True, explode=[0.08]*len(status_counts),
-                          textprops={'fontsize': 11, 'fontweight': 'bold'},
-                          wedgeprops={'edgecolor': 'white', 'linewidth': 1.5})
-            
-            # 设置百分比标签样式
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-                autotext.set_fontsize(10)
-            
-            axes[0, 2].set_title('游戏游玩分类占比', fontsize=16, fontweight='bold', pad=20)
-            
-            # 添加统计信息
-            total_games = len(df)
-            axes[0, 2].text(0, -1.3, f'总游戏数: {total_games}', 
-                           ha='center', fontsize=12,
-                           bbox=dict(boxstyle='round,pad=0.5', facecolor='#ecf0f1', alpha=0.9),
-                           fontweight='bold')
-        except Exception as e:
-            print(f"生成游戏游玩分类占比图时出错: {e}")
-            axes[0, 2].text(0.5, 0.5, '数据不足\n无法生成图表', ha='center', va='center', 
-                           transform=axes[0, 2].transAxes, fontsize=14, fontweight='bold')
-            axes[0, 2].set_title('游戏游玩分类占比', fontsize=16, fontweight='bold', pad=20)
-            axes[0, 2].axis('off')
-        
-        # 调整布局
-        plt.tight_layout(pad=2.5)
-        fig.subplots_adjust(top=0.90, hspace=0.45, wspace=0.35, bottom=0.08)
-        
-        # 保存图表
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"steam_analysis_{timestamp}.png"
-        plt.savefig(filename, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    filename = f"steam_analysis_{timestamp}.{profile.fmt}"
+                    write(filename)
+            finally:
+                # 关闭图表以释放资源
+                plt.close(fig)
         print(f"\n图表已保存为: {filename}")
-        
-        # 关闭图表以释放资源
-        plt.close(fig)
+        return filename
     
-    def run_analysis(self):
-        """运行完整分析"""
+    def run_analysis(self, force_refresh=False, profile=DEFAULT_RENDER_PROFILE, table_output='full',
+                     export=None, export_format=None, export_append=False, enrich=False, enrich_limit=None):
+        """运行完整分析，返回AnalysisResult（失败时返回None）
+
+        各阶段耗时记录在self.timer中；table_output为游戏表格的输出方式，见display_games_table；
+        提供export时同时把游戏表格导出到该路径，见export_games。
+        enrich为True时补充游玩时长最多的前enrich_limit款游戏(None为全部)的商店信息和成就，
+        结果保存在返回值的metadata属性中，见enrich_games；默认不补充，未启用时metadata为None。
+        """
+        if self.timer:
+            self.timer.reset()
         try:
             print("正在获取Steam游戏数据...")
-            games = self.get_owned_games()
+            with self._stage('获取游戏数据'):
+                games = self.get_owned_games(force_refresh)
             
             if not games:
                 print("未能获取到游戏数据，请检查API密钥和Steam ID是否正确。")
@@ -685,27 +1537,79 @@ class SteamGameAnalyzer:
             print(f"成功获取到 {len(games)} 款游戏的数据")
             
             # 显示表格
-            df = self.display_games_table(games)
+            with self._stage('游戏表格'):
+                df = self.display_games_table(games, table_output)
             
             # 检查DataFrame是否有效
             if df.empty:
                 print("游戏数据为空，无法生成分析图表。")
                 return
             
+            if export:
+                rows = self.export_games(df, export, export_format, export_append)
+                print(f"已导出 {rows} 款游戏的数据到: {export}")
+            
+            metadata = None
+            if enrich:
+                metadata = self.enrich_games(games, limit=enrich_limit, force_refresh=force_refresh)
+                print(f"已补充 {len(metadata)} 款游戏的商店信息和成就")
+            
+            with self._stage('计算统计量'):
+                result = self.analyze(df)
+            result.metadata = metadata
+            
             # 生成图表
             print("\n正在生成分析图表...")
-            self.generate_charts(df)
+            with self._stage('生成图表'):
+                self.generate_charts(df, profile, result=result)
             
             print("\n分析完成!")
+            return result
         except Exception as e:
             print(f"分析过程中出现错误: {e}")
             print("请检查您的数据和配置，然后重试。")
 
 if __name__ == "__main__":
+    import argparse
+    
     # 配置你的API密钥和Steam ID
     API_KEY = "YOUR_API_KEY_HERE"  # 替换为你的实际API密钥
     STEAM_ID = "YOUR_STEAM_ID_HERE"  # 替换为你的实际Steam ID
     
+    parser = argparse.ArgumentParser(description="分析Steam游戏库并生成图表")
+    parser.add_argument('--api-key', default=API_KEY, help="Steam API密钥")
+    parser.add_argument('--steam-id', default=STEAM_ID, help="Steam ID")
+    parser.add_argument('--profile', default=DEFAULT_RENDER_PROFILE, choices=sorted(RENDER_PROFILES), help="图表渲染配置")
+    parser.add_argument('--force-refresh', action='store_true', help="忽略本地缓存，重新请求API")
+    parser.add_argument('--table', default='full', choices=TABLE_OUTPUT_MODES, help="游戏表格的输出方式")
+    parser.add_argument('--timings', metavar='FILE', help="将各阶段耗时以JSON格式写入该文件，'-'表示输出到终端")
+    parser.add_argument('--track-memory', action='store_true', help="同时统计各阶段的峰值内存（会拖慢执行）")
+    parser.add_argument('--export', metavar='FILE', help="将游戏表格导出到该文件，格式由扩展名决定(.csv/.jsonl/.parquet)")
+    parser.add_argument('--export-format', choices=EXPORT_FORMATS, help="指定导出格式，不根据扩展名判断")
+    parser.add_argument('--append', action='store_true', help="追加到已有的导出数据，而不是覆盖")
+    parser.add_argument('--enrich', action='store_true', help="补充游戏的商店信息和成就完成度（每款游戏需要单独请求，首次运行较慢）")
+    parser.add_argument('--enrich-limit', type=int, metavar='N', help="只补充游玩时长最多的前N款游戏")
+    parser.add_argument('--summary-json', metavar='FILE', help="将统计摘要以JSON格式写入该文件，'-'表示输出到终端")
+    args = parser.parse_args()
+    
     # 创建分析器实例并运行分析
-    analyzer = SteamGameAnalyzer(API_KEY, STEAM_ID)
-    analyzer.run_analysis()
\ No newline at end of file
+    analyzer = SteamGameAnalyzer(args.api_key, args.steam_id, timer=StageTimer(track_memory=args.track_memory))
+    try:
+        result = analyzer.run_analysis(args.force_refresh, args.profile, args.table,
+                                       args.export, args.export_format, args.append, args.enrich, args.enrich_limit)
+    finally:
+        analyzer.close()
+    
+    if result is not None and args.summary_json == '-':
+        print(result.to_json())
+    elif result is not None and args.summary_json:
+        with open(args.summary_json, 'w', encoding='utf-8') as f:
+            f.write(result.to_json())
+        print(f"统计摘要已写入: {args.summary_json}")
+    
+    if args.timings == '-':
+        print(analyzer.timer.to_json())
+    elif args.timings:
+        with open(args.timings, 'w', encoding='utf-8') as f:
+            f.write(analyzer.timer.to_json())
+        print(f"各阶段耗时已写入: {args.timings}")
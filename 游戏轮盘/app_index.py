@@ -0,0 +1,184 @@
+"""离线的appid -> 游戏名称索引
+
+从Steam的应用列表(GetAppList)导出数据构建一个紧凑的二进制文件：
+    8字节标识 | 4字节条目数N | N个升序排列的appid(uint32) | N+1个名称偏移量(uint32) | UTF-8名称数据
+加载时通过mmap映射文件，不需要把整个列表读入内存；查询在appid数组上二分查找，每次只需几微秒。
+
+用法: python app_index.py dump.json [-o app_index.bin]
+      python app_index.py --download --api-key KEY [-o app_index.bin]
+"""
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import bisect
+import argparse
+import tempfile
+
+INDEX_MAGIC = b'APPIDX1\0'
+HEADER = struct.Struct('<8sI')
+DEFAULT_INDEX_FILE = "app_index.bin"
+APP_LIST_URL = "https://api.steampowered.com/IStoreService/GetAppList/v1/"
+APP_LIST_PAGE_SIZE = 50000  # GetAppList每页最多返回的条目数
+
+
+def iter_app_list(data):
+    """从应用列表导出数据中取出(appid, 名称)
+
+    支持ISteamApps/GetAppList的{"applist": {"apps": [...]}}、IStoreService/GetAppList的
+    {"response": {"apps": [...]}}以及直接的条目列表。
+    """
+    if isinstance(data, dict):
+        data = (data.get('applist') or data.get('response') or {}).get('apps', [])
+    for app in data:
+        try:
+            appid, name = int(app['appid']), app['name'].strip()
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        if name and 0 <= appid < 2 ** 32:
+            yield appid, name
+
+
+def _pack_uint32(values):
+    data = array.array('I', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def build_index(apps, path):
+    """把(appid, 名称)写入索引文件，appid重复时保留最后一个名称，返回条目数
+
+    先写入同目录的临时文件再替换，构建过程中的查询仍然使用旧的索引。
+    """
+    names = dict(apps)
+    appids = sorted(names)
+    offsets = [0]
+    blob = bytearray()
+    for appid in appids:
+        blob += names[appid].encode('utf-8')
+        offsets.append(len(blob))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.bin')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, len(appids)))
+            f.write(_pack_uint32(appids))
+            f.write(_pack_uint32(offsets))
+            f.write(blob)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(appids)
+
+
+def download_app_list(api_key, session=None, timeout=30):
+    """通过IStoreService/GetAppList分页下载完整的应用列表，产出(appid, 名称)"""
+    import requests
+    session = session or requests.Session()
+    params = {'key': api_key, 'max_results': APP_LIST_PAGE_SIZE, 'include_games': 1}
+    while True:
+        response = session.get(APP_LIST_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json().get('response', {})
+        yield from iter_app_list(data.get('apps', []))
+        if not data.get('have_more_results'):
+            break
+        params['last_appid'] = data['last_appid']
+
+
+class AppNameIndex:
+    """只读的appid -> 名称索引，文件通过mmap映射，多个线程可以同时查询"""
+
+    def __init__(self, path=DEFAULT_INDEX_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < HEADER.size:
+                raise ValueError(f"不是有效的游戏名称索引文件: {path}")
+            magic, count = HEADER.unpack_from(self._mmap)
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"不是有效的游戏名称索引文件: {path}")
+            appids_start = HEADER.size
+            offsets_start = appids_start + 4 * count
+            self._names_start = offsets_start + 4 * (count + 1)
+            if len(self._mmap) < self._names_start:
+                raise ValueError(f"游戏名称索引文件不完整: {path}")
+            self._view = memoryview(self._mmap)
+            self._appids = self._uint32_array(appids_start, count)
+            self._offsets = self._uint32_array(offsets_start, count + 1)
+        except BaseException:
+            self.close()
+            raise
+
+    def _uint32_array(self, start, count):
+        view = self._view[start:start + 4 * count]
+        if sys.byteorder == 'little':
+            # 直接在映射的内存上按uint32读取，不复制数据
+            return view.cast('I')
+        values = array.array('I', view)
+        values.byteswap()
+        return values
+
+    def __len__(self):
+        return len(self._appids)
+
+    def get(self, appid):
+        """返回appid对应的名称，不存在时返回None"""
+        try:
+            appid = int(appid)
+        except (TypeError, ValueError):
+            return None
+        i = bisect.bisect_left(self._appids, appid)
+        if i == len(self._appids) or self._appids[i] != appid:
+            return None
+        start = self._names_start + self._offsets[i]
+        end = self._names_start + self._offsets[i + 1]
+        return self._mmap[start:end].decode('utf-8')
+
+    def __contains__(self, appid):
+        return self.get(appid) is not None
+
+    def close(self):
+        # 先释放所有基于mmap的视图，否则mmap无法关闭
+        for name in ('_appids', '_offsets', '_view'):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="从Steam应用列表构建离线的游戏名称索引")
+    parser.add_argument('dump', nargs='?', help="GetAppList导出的JSON文件")
+    parser.add_argument('--download', action='store_true', help="直接通过Steam Web API下载应用列表")
+    parser.add_argument('--api-key', help="下载应用列表使用的Steam API密钥")
+    parser.add_argument('-o', '--output', default=DEFAULT_INDEX_FILE, help="索引文件路径")
+    args = parser.parse_args(argv)
+
+    if args.download:
+        if not args.api_key:
+            parser.error("下载应用列表需要提供--api-key")
+        apps = download_app_list(args.api_key)
+    elif args.dump:
+        with open(args.dump, 'r', encoding='utf-8') as f:
+            apps = iter_app_list(json.load(f))
+    else:
+        parser.error("请提供导出的JSON文件，或使用--download")
+
+    count = build_index(apps, args.output)
+    print(f"已写入 {count} 款游戏的名称索引: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
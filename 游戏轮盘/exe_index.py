@@ -0,0 +1,169 @@
+"""游戏可执行文件索引
+
+开始游戏时不再用os.walk遍历整个游戏目录：用os.scandir只向下查找有限的层数，
+跳过运行库、安装程序等目录，把找到的.exe按文件夹缓存到JSON文件中。
+游戏文件夹的修改时间没有变化时直接使用缓存；缓存的可执行文件不存在时重新查找。
+候选文件在启动时按所在层数、与游戏名称的相似度和文件大小排序，选出最可能的主程序。
+"""
+import os
+import re
+import json
+import math
+import tempfile
+import threading
+from difflib import SequenceMatcher
+
+DEFAULT_EXE_INDEX_FILE = "exe_index.json"
+EXE_MAX_DEPTH = 3  # 游戏文件夹下最多向下查找的层数，主程序通常在前两层
+EXE_INDEX_WORKERS = 4  # 后台建立索引的线程数
+EXE_INDEX_VERSION = 2  # 跳过规则变化时递增，旧版本规则下缓存的条目会重新查找
+
+# 不会包含游戏主程序的目录（小写）
+SKIP_DIRS = {
+    '_commonredist', 'commonredist', 'redist', 'redistributable', 'redistributables', 'directx', 'dotnet',
+    'vcredist', 'prereqs', 'prerequisites', 'installer', '__installer', 'support', 'crashreporter', '$pluginsdir',
+}
+# 不是游戏主程序的.exe：文件名(小写、不含扩展名)以这些内容开头的安装、卸载程序和崩溃报告工具。
+# 只按开头匹配，CrashBandicoot.exe、SupportHero.exe这类名称中带有相同单词的游戏不会被跳过
+SKIP_EXE_PREFIXES = (
+    'unins', 'setup', 'vc_redist', 'vcredist', 'dxsetup', 'dxwebsetup', 'dotnetfx', 'ndp4', 'oalinst', 'physx',
+    'ue4prereq', 'ueprereq', 'easyanticheat_setup', 'installer', 'crashreportclient', 'crashreporter',
+    'crashhandler', 'crashpad_handler', 'unitycrashhandler', 'bugreporter',
+)
+# 文件名(小写、不含扩展名)与这些完全相同的辅助程序
+SKIP_EXE_NAMES = {
+    'redist', 'prereq', 'prerequisites', 'launcherpatcher', 'cleanup', 'touchup', 'errorreporter', 'reportclient',
+    'crs-handler', 'crs-uploader', 'crs-video',
+}
+
+
+def is_helper_executable(filename):
+    """按文件名判断.exe是否是安装程序、崩溃报告工具等辅助程序"""
+    stem = os.path.splitext(filename.lower())[0]
+    return stem in SKIP_EXE_NAMES or stem.startswith(SKIP_EXE_PREFIXES)
+
+
+def _normalize(text):
+    return re.sub(r'[^0-9a-z\u4e00-\u9fff]+', '', text.lower())
+
+
+def scan_executables(game_path, max_depth=EXE_MAX_DEPTH):
+    """用os.scandir查找游戏文件夹中的.exe，返回[(相对路径, 文件大小, 层数), ...]"""
+    found = []
+    stack = [(game_path, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth < max_depth and entry.name.lower() not in SKIP_DIRS:
+                                stack.append((entry.path, depth + 1))
+                        elif entry.name.lower().endswith('.exe'):
+                            if not is_helper_executable(entry.name):
+                                found.append((os.path.relpath(entry.path, game_path), entry.stat().st_size, depth))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"读取目录失败: {e}")
+    return found
+
+
+def rank_executables(candidates, names):
+    """按可能是游戏主程序的程度从高到低排序
+
+    层数越浅越好；文件名与游戏名称或文件夹名越相似越好；同等条件下文件越大越可能是主程序。
+    """
+    names = [_normalize(name) for name in names if name]
+
+    def score(candidate):
+        relpath, size, depth = candidate
+        stem = _normalize(os.path.splitext(os.path.basename(relpath))[0])
+        similarity = max((SequenceMatcher(None, stem, name).ratio() for name in names), default=0.0)
+        return similarity * 3 - depth + math.log10(size + 1) / 4
+
+    return sorted(candidates, key=score, reverse=True)
+
+
+class ExecutableIndex:
+    """按游戏文件夹缓存可执行文件候选列表，可以在多个线程中同时使用"""
+
+    def __init__(self, path=DEFAULT_EXE_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = {}  # 游戏文件夹 -> {'mtime': 修改时间, 'version': 规则版本, 'exes': [[相对路径, 大小, 层数], ...]}
+        self._dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"加载可执行文件索引失败: {e}")
+
+    @staticmethod
+    def _key(game_path):
+        return os.path.normcase(os.path.abspath(game_path))
+
+    def candidates(self, game_path, refresh=False):
+        """返回游戏文件夹中的可执行文件候选列表，缓存失效时重新查找"""
+        key = self._key(game_path)
+        try:
+            mtime = os.stat(game_path).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            entry = self._entries.get(key)
+        if (entry is not None and entry.get('mtime') == mtime and entry.get('version') == EXE_INDEX_VERSION
+                and not refresh):
+            return [tuple(exe) for exe in entry['exes']]
+
+        exes = scan_executables(game_path)
+        with self._lock:
+            self._entries[key] = {'mtime': mtime, 'version': EXE_INDEX_VERSION, 'exes': [list(exe) for exe in exes]}
+            self._dirty = True
+        return exes
+
+    def best(self, game_path, names=()):
+        """返回最可能是游戏主程序的可执行文件完整路径，找不到时返回None"""
+        names = list(names) + [os.path.basename(os.path.normpath(game_path))]
+        # 缓存中的文件已不存在时（游戏更新或重装）重新查找一次
+        for refresh in (False, True):
+            ranked = rank_executables(self.candidates(game_path, refresh), names)
+            if ranked and os.path.isfile(os.path.join(game_path, ranked[0][0])):
+                return os.path.join(game_path, ranked[0][0])
+        return None
+
+    def build(self, game_paths, max_workers=EXE_INDEX_WORKERS):
+        """为多个游戏文件夹建立索引（已缓存且未变化的会跳过），完成后保存；适合在后台线程中调用"""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.candidates, game_paths))
+        self.save()
+
+    def save(self):
+        """有变化时保存索引，先写入临时文件再替换"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._entries, ensure_ascii=False)
+                self._dirty = False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                with self._lock:
+                    self._dirty = True
+                raise
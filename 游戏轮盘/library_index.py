@@ -0,0 +1,135 @@
+"""游戏库目录的双向索引：文件夹 <-> appid <-> 显示名称
+
+扫描完成后保存到JSON文件，按游戏库路径分别记录。游戏库目录的修改时间没有变化
+（没有增删游戏文件夹）时直接使用保存的索引，不需要重新列出目录和读取steam_appid.txt；
+开始游戏时也可以通过名称直接找到对应的文件夹。
+扫描时没有查询到中文名称（使用离线索引中的英文名称或文件夹名）的游戏在之后使用索引时会重新查询。
+"""
+import os
+import json
+import tempfile
+
+DEFAULT_LIBRARY_INDEX_FILE = "library_index.json"
+
+
+def library_key(path):
+    """同一个游戏库目录的不同写法(大小写、结尾斜杠、相对路径)使用同一个键"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def directory_mtime(path):
+    return os.stat(path).st_mtime_ns
+
+
+class LibraryIndex:
+    """一个游戏库目录的扫描结果，entries为按文件夹顺序排列的(文件夹, appid或None, 显示名称)
+
+    unresolved为名称需要重新查询的文件夹，省略时为有appid但名称就是文件夹名的游戏。
+    """
+
+    def __init__(self, path, mtime, entries, unresolved=None):
+        self.path = path
+        self.mtime = mtime
+        self.entries = [(folder, appid, name) for folder, appid, name in entries]
+        if unresolved is None:
+            unresolved = [folder for folder, appid, name in self.entries if appid and name == folder]
+        self._unresolved = set(unresolved)
+        self._by_folder = {}
+        self._by_name = {}
+        self._by_appid = {}
+        for folder, appid, name in self.entries:
+            self._by_folder[folder] = (appid, name)
+            # 名称或appid重复时（同一游戏装了两份）保留第一个文件夹
+            self._by_name.setdefault(name, folder)
+            if appid:
+                self._by_appid.setdefault(appid, folder)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def folders(self):
+        return [folder for folder, _, _ in self.entries]
+
+    @property
+    def names(self):
+        return [name for _, _, name in self.entries]
+
+    def folder_for_name(self, name):
+        return self._by_name.get(name)
+
+    def folder_for_appid(self, appid):
+        return self._by_appid.get(str(appid))
+
+    def name_for_folder(self, folder):
+        entry = self._by_folder.get(folder)
+        return entry[1] if entry else None
+
+    def appid_for_folder(self, folder):
+        entry = self._by_folder.get(folder)
+        return entry[0] if entry else None
+
+    def unresolved(self):
+        """有appid但扫描时没有查询到中文名称的游戏，返回[(文件夹, appid), ...]"""
+        return [(folder, appid) for folder, appid, _ in self.entries if appid and folder in self._unresolved]
+
+    def is_current(self):
+        """游戏库目录在扫描之后没有增删文件夹"""
+        try:
+            return directory_mtime(self.path) == self.mtime
+        except OSError:
+            return False
+
+    def to_dict(self):
+        return {'path': self.path, 'mtime': self.mtime, 'entries': [list(entry) for entry in self.entries],
+                'unresolved': sorted(self._unresolved)}
+
+    @classmethod
+    def from_dict(cls, data):
+        # 没有unresolved的旧索引无法区分名称来源，所有游戏都重新核对一次，名称缓存中已有的不会联网
+        unresolved = data.get('unresolved')
+        if unresolved is None:
+            unresolved = [entry[0] for entry in data['entries']]
+        return cls(data['path'], data['mtime'], data['entries'], unresolved)
+
+
+def _read_all(index_file):
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"加载游戏库索引失败: {e}")
+        return {}
+
+
+def load_library_index(index_file, path):
+    """返回path对应的、仍然有效的LibraryIndex，没有保存过或目录已变化时返回None"""
+    data = _read_all(index_file).get(library_key(path))
+    if not data:
+        return None
+    try:
+        index = LibraryIndex.from_dict(data)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return index if index.is_current() else None
+
+
+def save_library_index(index_file, index):
+    """保存索引，同一文件中其他游戏库的索引保持不变；先写入临时文件再替换"""
+    data = _read_all(index_file)
+    data[library_key(index.path)] = index.to_dict()
+    directory = os.path.dirname(os.path.abspath(index_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, index_file)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
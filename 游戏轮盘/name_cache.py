@@ -0,0 +1,114 @@
+"""按appid缓存游戏名称的SQLite库
+
+取代旧的game_cache.txt（每三行一个条目、按文件夹名记录、每次整体重写）：
+- 以appid为键，同一款游戏换了文件夹或游戏库也能命中
+- 每个条目记录获取时间，名称NAME_TTL后过期；查询失败的条目只保留NEGATIVE_TTL，
+  网络暂时出错不会让这款游戏永远只显示文件夹名
+- 每次查询到名称后立即单独写入，写入在事务中完成，中途退出不会破坏已有的缓存
+- 旧缓存第一次打开时整体导入legacy_names表（仍按文件夹名记录），
+  对应的文件夹被扫描到、得知appid后再移入game_names，其他游戏库的名称不会丢失
+"""
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_NAME_CACHE_FILE = "game_cache.db"
+NAME_TTL = 90 * 86400  # 游戏名称很少变化
+NEGATIVE_TTL = 3600  # 查询失败(商店中没有或网络错误)后一小时内不再重复查询
+
+SCHEMA = """
+-- name为NULL表示查询失败的条目
+CREATE TABLE IF NOT EXISTS game_names (
+    appid TEXT PRIMARY KEY,
+    name TEXT,
+    fetched_at INTEGER NOT NULL
+) WITHOUT ROWID;
+-- 从game_cache.txt导入、尚未对应到appid的名称
+CREATE TABLE IF NOT EXISTS legacy_names (
+    folder TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def read_legacy_cache(path):
+    """读取旧格式的game_cache.txt，返回{文件夹名: 名称}；名称与文件夹名相同的是查询失败的条目，不返回"""
+    names = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+    except FileNotFoundError:
+        return names
+    except OSError as e:
+        print(f"加载旧缓存文件失败: {e}")
+        return names
+    for i in range(0, len(lines) - 1, 3):
+        folder_name, game_name = lines[i].strip(), lines[i + 1].strip()
+        if folder_name and game_name and game_name != folder_name:
+            names[folder_name] = game_name
+    return names
+
+
+class GameNameCache:
+    """appid -> 游戏名称的缓存，可以在多个扫描线程中同时使用"""
+
+    def __init__(self, path=DEFAULT_NAME_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """每次操作使用独立的连接并在事务中执行"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self):
+        """返回所有未过期的条目{appid: 名称或None}，None表示近期查询失败"""
+        now = int(time.time())
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT appid, name FROM game_names WHERE (name IS NOT NULL AND fetched_at >= ?) "
+                "OR (name IS NULL AND fetched_at >= ?)", (now - NAME_TTL, now - NEGATIVE_TTL))
+            return dict(rows)
+
+    def put(self, appid, name):
+        """写入一个条目，name为None时记录为查询失败"""
+        self.put_many({appid: name})
+
+    def put_many(self, names):
+        now = int(time.time())
+        rows = [(str(appid), name, now) for appid, name in names.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO game_names (appid, name, fetched_at) VALUES (?, ?, ?)", rows)
+
+    def import_legacy(self, names):
+        """导入旧缓存的{文件夹名: 名称}，已导入过的文件夹保留原有记录"""
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO legacy_names (folder, name) VALUES (?, ?)", names.items())
+
+    def load_legacy(self):
+        """返回尚未迁移的旧缓存条目{文件夹名: 名称}"""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT folder, name FROM legacy_names"))
+
+    def migrate_legacy(self, folder, appid, name):
+        """把旧缓存中文件夹对应的名称按appid写入缓存，并删除旧条目"""
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO game_names (appid, name, fetched_at) VALUES (?, ?, ?)",
+                         (str(appid), name, int(time.time())))
+            conn.execute("DELETE FROM legacy_names WHERE folder = ?", (folder,))
+
+    def purge(self):
+        """删除已过期的条目"""
+        now = int(time.time())
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM game_names WHERE (name IS NOT NULL AND fetched_at < ?) "
+                         "OR (name IS NULL AND fetched_at < ?)", (now - NAME_TTL, now - NEGATIVE_TTL))
@@ -0,0 +1,58 @@
+"""扫描线程共享的商店接口限流器
+
+商店接口(appdetails)的限制约为每5分钟200次，超出后返回429。所有扫描线程从同一个令牌桶
+取令牌，把总请求速率控制在限制以内；收到429时调用pause()，所有线程一起暂停到Retry-After之后。
+"""
+import time
+import threading
+
+STORE_RATE = 0.6  # 商店接口请求速率(次/秒)
+STORE_BURST = 5  # 允许的突发请求数，缓存未命中较少时不必等待
+MAX_BACKOFF = 60  # 收到429后单次最长暂停时间(秒)
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器"""
+
+    def __init__(self, rate=STORE_RATE, capacity=STORE_BURST):
+        self.rate = rate  # 每秒补充的令牌数
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取走一个令牌，令牌不足或处于暂停期时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """所有线程暂停seconds秒后才能继续请求，并清空已积累的令牌"""
+        seconds = min(seconds, MAX_BACKOFF)
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0
+            self._updated = self._paused_until
+
+
+def retry_delay(retry_after, attempt):
+    """收到429后的等待时间：优先使用Retry-After(秒)，没有时按指数退避"""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 1.0), MAX_BACKOFF)
+        except ValueError:
+            pass
+    return min(5 * 2 ** attempt, MAX_BACKOFF)
@@ -2,11 +2,28 @@ import os
 import random
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import requests
 import webbrowser
-from PIL import Image, ImageTk
 import time
 import json
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from library_index import LibraryIndex, load_library_index, save_library_index, directory_mtime
+from exe_index import ExecutableIndex
+from name_cache import GameNameCache, read_legacy_cache
+from rate_limit import TokenBucket, retry_delay
+
+SCAN_WORKERS = 8  # 并发查询游戏名称的线程数
+SCAN_POLL_MS = 50  # 扫描进度窗口读取结果的间隔(毫秒)
+INDEX_POLL_MS = 200  # 后台更新名称索引时检查是否完成的间隔(毫秒)
+STORE_MAX_RETRIES = 3  # 商店接口返回429时的最大重试次数
+
+
+class StoreThrottled(Exception):
+    """商店接口多次重试后仍然返回429，这次查询没有结果，但不代表游戏没有名称"""
+
 
 class FolderRoulette:
     def __init__(self, root):
@@ -17,7 +34,11 @@ class FolderRoulette:
         
         # 配置文件和缓存文件路径
         self.config_file = "config.json"
-        self.cache_file = "game_cache.txt"
+        self.cache_file = "game_cache.txt"  # 旧格式的缓存，只用于迁移
+        self.name_cache_file = "game_cache.db"
+        self.app_index_file = "app_index.bin"
+        self.library_index_file = "library_index.json"
+        self.exe_index_file = "exe_index.json"
         
         # 加载配置
         self.load_config()
@@ -66,6 +87,21 @@ class FolderRoulette:
         self.folders = []
         self.roulette_running = False
         self.selected_game = None
+        self.selected_folder = None
+        self.library = None  # 当前游戏库的LibraryIndex
+        self.name_cache = None
+        self.cached_names = {}  # appid -> 名称，None表示近期查询失败
+        self.legacy_names = {}  # 旧缓存中尚未对应到appid的 文件夹名 -> 名称
+        self.exe_index = None
+        self._exe_index_thread = None
+        self.scanning = False
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.store_limiter = TokenBucket()  # 所有扫描线程共享，控制商店接口的总请求速率
+        self.app_index = None
+        self._app_index_mtime = None
+        # 查询、重新加载和重建离线索引时持有：Windows上文件仍被映射时无法被替换
+        self._app_index_lock = threading.Lock()
         
         self.create_widgets()
         
@@ -101,30 +137,59 @@ class FolderRoulette:
             print(f"保存配置文件失败: {e}")
     
     def load_cache(self):
-        """加载缓存文件"""
-        self.cached_games = {}
-        if os.path.exists(self.cache_file):
+        """加载游戏名称缓存
+
+        旧格式的game_cache.txt第一次加载时整体导入新缓存，之后改名保留备份；
+        其中的名称按文件夹记录，扫描到对应的文件夹时再按appid迁移。
+        """
+        if self.name_cache is None:
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    i = 0
-                    while i < len(lines):
-                        folder_name = lines[i].strip()
-                        if i + 1 < len(lines):
-                            chinese_name = lines[i + 1].strip()
-                            self.cached_games[folder_name] = chinese_name
-                        i += 3  # 跳过空行
-            except Exception as e:
+                self.name_cache = GameNameCache(self.name_cache_file)
+            except sqlite3.Error as e:
+                print(f"打开缓存文件失败: {e}")
+        self.cached_names = {}
+        if self.name_cache is not None:
+            try:
+                # 先删除过期的条目，缓存文件不会随着查询失败的记录一直增长
+                self.name_cache.purge()
+                self.cached_names = self.name_cache.load()
+            except sqlite3.Error as e:
                 print(f"加载缓存文件失败: {e}")
+        if self.name_cache is None:
+            # 新缓存不可用时直接使用旧文件，不做迁移
+            self.legacy_names = read_legacy_cache(self.cache_file) if os.path.exists(self.cache_file) else {}
+            return
+        if os.path.exists(self.cache_file):
+            try:
+                self.name_cache.import_legacy(read_legacy_cache(self.cache_file))
+                os.replace(self.cache_file, self.cache_file + ".bak")
+            except (sqlite3.Error, OSError) as e:
+                print(f"迁移旧缓存文件失败: {e}")
+        try:
+            self.legacy_names = self.name_cache.load_legacy()
+        except sqlite3.Error as e:
+            print(f"加载旧缓存失败: {e}")
+            self.legacy_names = {}
     
-    def save_cache(self):
-        """保存缓存文件"""
+    def cache_name(self, app_id, game_name):
+        """记录查询结果，game_name为None表示查询失败；每次立即写入，在扫描线程中调用"""
+        self.cached_names[app_id] = game_name
+        if self.name_cache is None:
+            return
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                for folder_name, chinese_name in self.cached_games.items():
-                    f.write(f"{folder_name}\n{chinese_name}\n\n")
-        except Exception as e:
-            print(f"保存缓存文件失败: {e}")
+            self.name_cache.put(app_id, game_name)
+        except sqlite3.Error as e:
+            print(f"保存缓存失败: {e}")
+    
+    def migrate_legacy_name(self, app_id, folder, game_name):
+        """把旧缓存中按文件夹记录的名称按appid写入新缓存；在扫描线程中调用"""
+        self.cached_names[app_id] = game_name
+        if self.name_cache is None:
+            return
+        try:
+            self.name_cache.migrate_legacy(folder, app_id, game_name)
+        except sqlite3.Error as e:
+            print(f"保存缓存失败: {e}")
     
     def create_widgets(self):
         # 主框架
@@ -165,9 +230,12 @@ class FolderRoulette:
         api_button = ttk.Button(api_key_frame, text="获取API密钥", command=self.open_api_page, style='Modern.TButton')
         api_button.pack(side=tk.RIGHT)
         
+        self.index_button = ttk.Button(api_key_frame, text="更新名称索引", command=self.update_app_index, style='Modern.TButton')
+        self.index_button.pack(side=tk.RIGHT, padx=(0, 10))
+        
         # 扫描按钮
-        scan_button = ttk.Button(main_frame, text="扫描游戏", command=self.scan_folders, style='Modern.TButton')
-        scan_button.pack(pady=15)
+        self.scan_button = ttk.Button(main_frame, text="扫描游戏", command=self.scan_folders, style='Modern.TButton')
+        self.scan_button.pack(pady=15)
         
         # 游戏数量显示
         self.game_count_label = ttk.Label(main_frame, text="游戏数量: 0", style='Modern.TLabel')
@@ -207,23 +275,181 @@ class FolderRoulette:
     def open_api_page(self):
         webbrowser.open("https://steamcommunity.com/dev/apikey")
     
+    def get_session(self):
+        """扫描线程共享的HTTP会话，复用连接；第一次需要联网时才创建"""
+        with self._session_lock:
+            if self._session is None:
+                # 延迟导入requests，只有缓存未命中需要联网时才加载，加快窗口启动
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SCAN_WORKERS)
+                self._session.mount('https://', adapter)
+            return self._session
+    
     def get_steam_game_name(self, app_id):
+        """通过商店接口查询游戏的中文名称，失败时返回None；可以在多个线程中同时调用
+
+        请求经过共享的限流器；返回429时所有线程按Retry-After暂停后重试，
+        重试STORE_MAX_RETRIES次仍被限流时抛出StoreThrottled。
+        """
+        import requests
+        
         url = f"https://store.steampowered.com/api/appdetails?appids={app_id}&l=schinese"
+        for attempt in range(STORE_MAX_RETRIES + 1):
+            self.store_limiter.acquire()
+            try:
+                response = self.get_session().get(url, timeout=10)
+                if response.status_code == 429:
+                    delay = retry_delay(response.headers.get('Retry-After'), attempt)
+                    print(f"商店接口请求过于频繁，{delay:.0f}秒后重试")
+                    self.store_limiter.pause(delay)
+                    continue
+                if response.status_code == 200:
+                    data = response.json()
+                    if data[str(app_id)]['success']:
+                        name = data[str(app_id)]['data']['name']
+                        if name:
+                            return name
+                else:
+                    print(f"请求失败，状态码: {response.status_code}")
+            except requests.RequestException as e:
+                print(f"请求异常: {e}")
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"商店接口返回的数据格式不正确: {e}")
+            return None
+        raise StoreThrottled(app_id)
+    
+    def resolve_folder_name(self, folder_path, folder):
+        """读取文件夹中的steam_appid.txt并确定显示名称，返回(appid或None, 名称)；在扫描线程中执行
+
+        名称依次从缓存和商店接口获取，商店接口查询不到或被限流时使用离线索引，都没有时使用文件夹名。
+        """
+        appid_file = os.path.join(folder_path, "steam_appid.txt")
+        app_id = None
+        if os.path.exists(appid_file):
+            try:
+                with open(appid_file, 'r') as file:
+                    app_id = file.read().strip() or None
+            except Exception as e:
+                print(f"读取appid文件失败: {e}")
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data[str(app_id)]['success']:
-                    name = data[str(app_id)]['data']['name']
-                    if name:
-                        return name
-            else:
-                print(f"请求失败，状态码: {response.status_code}")
-        except requests.RequestException as e:
-            print(f"请求异常: {e}")
+            return app_id, self.lookup_game_name(app_id, folder)
+        except Exception as e:
+            # 保留appid，之后使用游戏库索引时还能重新查询名称
+            print(f"获取游戏名称失败: {e}")
+            return app_id, folder
+    
+    def lookup_game_name(self, app_id, folder):
+        """查询文件夹对应的游戏名称，查询失败时返回文件夹名
+
+        依次使用缓存、旧缓存，最后通过商店接口查询中文名称；近期查询失败的游戏不会重复请求。
+        离线索引来自GetAppList，只有英文名称，仅在商店接口查询不到或被限流时使用。
+        """
+        if not app_id:
+            return folder
+        game_name = self.cached_game_name(app_id, folder)
+        if game_name is not None:
+            return game_name
+        try:
+            game_name = self.get_steam_game_name(app_id)
+        except StoreThrottled:
+            # 被限流不是查询失败，不写入缓存，下次扫描时重新查询
+            return self.app_index_name(app_id) or folder
+        self.cache_name(app_id, game_name)
+        return game_name or self.app_index_name(app_id) or folder
+    
+    def cached_game_name(self, app_id, folder):
+        """不联网查询游戏名称：近期查询失败的游戏返回离线索引中的名称或文件夹名，需要通过商店接口查询时返回None"""
+        game_name = self.cached_names.get(app_id)
+        if game_name:
+            return game_name
+        game_name = self.legacy_names.pop(folder, None)
+        if game_name:
+            self.migrate_legacy_name(app_id, folder, game_name)
+            return game_name
+        if app_id in self.cached_names:
+            return self.app_index_name(app_id) or folder
         return None
     
+    def app_index_name(self, app_id):
+        """在离线索引中查询游戏名称，没有索引或索引中没有该游戏时返回None；可以在多个线程中同时调用"""
+        with self._app_index_lock:
+            if self.app_index is None:
+                return None
+            return self.app_index.get(app_id)
+    
+    def close_app_index(self):
+        """关闭离线索引，解除对索引文件的映射；调用时需持有_app_index_lock"""
+        if self.app_index is not None:
+            self.app_index.close()
+            self.app_index = None
+            self._app_index_mtime = None
+    
+    def load_app_index(self):
+        """加载离线的游戏名称索引，索引文件更新后重新加载；没有索引文件时所有名称都通过网络查询"""
+        try:
+            mtime = os.path.getmtime(self.app_index_file)
+        except OSError:
+            return
+        # 延迟导入，只在扫描时才需要
+        from app_index import AppNameIndex
+        with self._app_index_lock:
+            if self.app_index is not None and mtime == self._app_index_mtime:
+                return
+            try:
+                app_index = AppNameIndex(self.app_index_file)
+            except (OSError, ValueError) as e:
+                print(f"加载游戏名称索引失败: {e}")
+                return
+            # 之前取消的扫描线程也通过锁查询，关闭旧索引时不会有线程正在读取
+            self.close_app_index()
+            self.app_index = app_index
+            self._app_index_mtime = mtime
+    
+    def update_app_index(self):
+        """在后台下载Steam应用列表并重建离线名称索引"""
+        api_key = self.api_key.get()
+        if not api_key:
+            messagebox.showerror("错误", "更新名称索引需要Steam API密钥")
+            return
+        self.save_config()
+        from app_index import build_index, download_app_list
+        
+        self.index_button.config(state=tk.DISABLED)
+        self.result_label.config(text="正在下载游戏名称索引...")
+        outcome = {}
+        
+        def work():
+            try:
+                apps = list(download_app_list(api_key, self.get_session()))
+                # 下载完成后才关闭当前索引，替换文件期间扫描线程查询不到离线名称，下次扫描时重新加载
+                with self._app_index_lock:
+                    self.close_app_index()
+                    outcome['count'] = build_index(apps, self.app_index_file)
+            except Exception as e:
+                outcome['error'] = e
+        
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        
+        def poll():
+            if worker.is_alive():
+                self.root.after(INDEX_POLL_MS, poll)
+                return
+            self.index_button.config(state=tk.NORMAL)
+            if 'error' in outcome:
+                self.result_label.config(text="更新名称索引失败")
+                messagebox.showerror("错误", f"更新名称索引失败: {outcome['error']}")
+            else:
+                self.result_label.config(text=f"名称索引已更新，共 {outcome['count']} 款游戏")
+        
+        poll()
+    
     def scan_folders(self):
+        if self.scanning:
+            return
+        
         path = self.folder_path.get()
         if not path:
             messagebox.showerror("错误", "请选择一个文件夹")
@@ -236,12 +462,41 @@ class FolderRoulette:
             messagebox.showerror("错误", "选择的文件夹不存在")
             return
         
-        # 加载缓存
-        self.load_cache()
+        # 游戏库目录没有增删文件夹时直接使用上次保存的索引
+        library = load_library_index(self.library_index_file, path)
+        if library is not None and not library.unresolved():
+            self.apply_library(library)
+            return
         
-        # 扫描第一层子文件夹并尝试获取Steam游戏名称
-        game_folders = [f for f in os.listdir(path) if os.path.isdir(os.path.join(path, f))]
-        self.folders = []
+        # 加载缓存和离线名称索引
+        self.load_cache()
+        self.load_app_index()
+        
+        if library is not None:
+            # 上次没有查询到中文名称(使用离线索引中的名称或文件夹名)的游戏重新查询：
+            # 名称缓存中查询失败的记录过期后再次请求商店接口；其余游戏沿用保存的结果
+            mtime = library.mtime
+            game_folders = library.folders
+            resolved = {folder: (appid, name) for folder, appid, name in library.entries}
+            for folder, appid in library.unresolved():
+                game_name = self.cached_game_name(appid, folder)
+                if game_name is None:
+                    del resolved[folder]
+                else:
+                    resolved[folder] = (appid, game_name)
+            if len(resolved) == len(game_folders):
+                if all(resolved[folder] == (appid, name) for folder, appid, name in library.entries):
+                    self.apply_library(library)
+                else:
+                    self.finish_scan(path, mtime, game_folders, resolved)
+                return
+        else:
+            # 在列出目录之前记录修改时间，扫描期间目录发生变化时下次会重新扫描
+            mtime = directory_mtime(path)
+            # 扫描第一层子文件夹，交给线程池并发读取appid并查询Steam游戏名称
+            game_folders = [f for f in os.listdir(path) if os.path.isdir(os.path.join(path, f))]
+            resolved = {}  # 文件夹 -> (appid, 名称)
+        pending = [f for f in game_folders if f not in resolved]
         
         # 创建进度条窗口
         progress_window = tk.Toplevel(self.root)
@@ -254,49 +509,84 @@ class FolderRoulette:
         
         progress_bar = ttk.Progressbar(progress_window, length=300, mode='determinate')
         progress_bar.pack(pady=10)
-        progress_bar['maximum'] = len(game_folders)
-        
-        for i, f in enumerate(game_folders):
-            folder_path = os.path.join(path, f)
-            if os.path.isdir(folder_path):
-                # 检查缓存中是否有该游戏
-                if f in self.cached_games:
-                    game_name = self.cached_games[f]
-                    self.folders.append(game_name)
-                else:
-                    appid_file = os.path.join(folder_path, "steam_appid.txt")
-                    if os.path.exists(appid_file):
-                        try:
-                            with open(appid_file, 'r') as file:
-                                app_id = file.read().strip()
-                                game_name = self.get_steam_game_name(app_id)
-                                if game_name:
-                                    self.folders.append(game_name)
-                                    # 添加到缓存
-                                    self.cached_games[f] = game_name
-                                else:
-                                    self.folders.append(f)
-                                    # 添加到缓存
-                                    self.cached_games[f] = f
-                        except Exception as e:
-                            print(f"读取appid文件失败: {e}")
-                            self.folders.append(f)
-                            # 添加到缓存
-                            self.cached_games[f] = f
-                    else:
-                        self.folders.append(f)
-                        # 添加到缓存
-                        self.cached_games[f] = f
-            
-            # 更新进度条
-            progress_bar['value'] = i + 1
-            progress_window.update()
+        progress_bar['maximum'] = max(len(game_folders), 1)
+        
+        self.scanning = True
+        self.scan_button.config(state=tk.DISABLED)
+        self.start_button.config(state=tk.DISABLED)
+        
+        # 工作线程把(文件夹, 结果)放入队列，界面线程定时取出并更新进度，窗口在查询期间保持响应
+        results = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=SCAN_WORKERS)
+        futures = []
+        for f in pending:
+            future = executor.submit(self.resolve_folder_name, os.path.join(path, f), f)
+            future.add_done_callback(lambda future, f=f: results.put((f, future)))
+            futures.append(future)
+        
+        def finish(cancelled=False):
+            executor.shutdown(wait=False, cancel_futures=True)
+            progress_window.destroy()
+            self.scanning = False
+            self.scan_button.config(state=tk.NORMAL)
+            self.finish_scan(path, mtime, game_folders, resolved, cancelled)
+        
+        def cancel():
+            # 关闭进度窗口即取消扫描，尚未查询的游戏暂时使用文件夹名，且不保存游戏库索引
+            for future in futures:
+                future.cancel()
+            finish(cancelled=True)
+        
+        def poll():
+            if not self.scanning:
+                return
+            while True:
+                try:
+                    f, future = results.get_nowait()
+                except queue.Empty:
+                    break
+                if future.cancelled():
+                    continue
+                try:
+                    app_id, game_name = future.result()
+                except Exception as e:
+                    print(f"获取游戏名称失败: {e}")
+                    app_id, game_name = None, f
+                resolved[f] = (app_id, game_name)
+                progress_label.config(text=f"已获取 {len(resolved)}/{len(game_folders)}: {game_name}")
+            progress_bar['value'] = len(resolved)
+            if len(resolved) >= len(game_folders):
+                finish()
+            else:
+                self.root.after(SCAN_POLL_MS, poll)
         
-        # 关闭进度条窗口
-        progress_window.destroy()
+        progress_window.protocol("WM_DELETE_WINDOW", cancel)
+        poll()
+    
+    def finish_scan(self, path, mtime, game_folders, resolved, cancelled=False):
+        """扫描结束后按文件夹顺序建立游戏库索引并保存；名称缓存在查询时已经逐条写入"""
+        entries = [(f,) + resolved.get(f, (None, f)) for f in game_folders]
+        # 名称缓存中没有的名称来自离线索引或文件夹名，之后使用索引时重新查询
+        unresolved = [f for f, appid, _ in entries if appid and not self.cached_names.get(appid)]
+        library = LibraryIndex(path, mtime, entries, unresolved)
+        
+        if not cancelled:
+            try:
+                save_library_index(self.library_index_file, library)
+            except OSError as e:
+                print(f"保存游戏库索引失败: {e}")
         
-        # 保存缓存
-        self.save_cache()
+        self.apply_library(library)
+        if cancelled and library.entries:
+            self.result_label.config(text="扫描已取消，未获取名称的游戏使用文件夹名")
+    
+    def apply_library(self, library):
+        """使用扫描结果或保存的索引更新游戏列表"""
+        self.library = library
+        self.folders = library.names
+        self.selected_game = None
+        self.selected_folder = None
+        self.play_button.config(state=tk.DISABLED)
         
         if not self.folders:
             messagebox.showwarning("警告", "该文件夹中没有Steam游戏")
@@ -306,6 +596,28 @@ class FolderRoulette:
         self.game_count_label.config(text=f"游戏数量: {len(self.folders)}")
         self.result_label.config(text="扫描完成，点击开始轮盘")
         self.start_button.config(state=tk.NORMAL)
+        self.build_exe_index(library)
+    
+    def get_exe_index(self):
+        if self.exe_index is None:
+            self.exe_index = ExecutableIndex(self.exe_index_file)
+        return self.exe_index
+    
+    def build_exe_index(self, library):
+        """在后台为游戏库中的所有游戏查找可执行文件，开始游戏时直接使用结果"""
+        if self._exe_index_thread is not None and self._exe_index_thread.is_alive():
+            return
+        exe_index = self.get_exe_index()
+        game_paths = [os.path.join(library.path, folder) for folder in library.folders]
+        
+        def work():
+            try:
+                exe_index.build(game_paths)
+            except Exception as e:
+                print(f"建立可执行文件索引失败: {e}")
+        
+        self._exe_index_thread = threading.Thread(target=work, daemon=True)
+        self._exe_index_thread.start()
     
     def start_roulette(self):
         if not self.folders or self.roulette_running:
@@ -347,9 +659,11 @@ class FolderRoulette:
         if not self.folders:
             return
         
-        # 最终选择
-        selected = random.choice(self.folders)
+        # 最终选择，同时记下对应的文件夹，开始游戏时不需要再按名称查找
+        index = random.randrange(len(self.folders))
+        selected = self.folders[index]
         self.selected_game = selected
+        self.selected_folder = self.library.entries[index][0] if self.library else None
         
         # 显示最终选择的游戏，使用更突出的颜色
         self.result_label.config(text=f"选中的游戏: {selected}", foreground='#00e676', font=('Helvetica', 20, 'bold'))
@@ -364,8 +678,8 @@ class FolderRoulette:
         
         print(f"选中的游戏: {self.selected_game}")
         
-        # 获取游戏文件夹路径
-        path = self.folder_path.get()
+        # 获取游戏文件夹路径，选中的游戏属于上次扫描的游戏库
+        path = self.library.path if self.library is not None else self.folder_path.get()
         print(f"游戏文件夹路径: {path}")
         
         if not path:
@@ -378,53 +692,14 @@ class FolderRoulette:
         
         # 标准化路径
         path = os.path.normpath(path)
-        print(f"标准化后的游戏文件夹路径: {path}")
         
-        game_folders = [f for f in os.listdir(path) if os.path.isdir(os.path.join(path, f))]
-        print(f"找到的游戏文件夹: {game_folders}")
+        # 通过扫描时建立的索引直接找到选中游戏的文件夹
+        game_folder = self.selected_folder
+        if not game_folder and self.library is not None:
+            game_folder = self.library.folder_for_name(self.selected_game)
         
-        # 查找选中游戏对应的文件夹
-        game_folder = None
-        
-        # 首先尝试通过Steam API获取的游戏名称匹配
-        for folder in game_folders:
-            folder_path = os.path.join(path, folder)
-            folder_path = os.path.normpath(folder_path)
-            appid_file = os.path.join(folder_path, "steam_appid.txt")
-            appid_file = os.path.normpath(appid_file)
-            
-            if os.path.exists(appid_file):
-                try:
-                    with open(appid_file, 'r') as file:
-                        app_id = file.read().strip()
-                        print(f"文件夹 '{folder}' 中的appid: {app_id}")
-                        
-                        if app_id:
-                            game_name = self.get_steam_game_name(app_id)
-                            print(f"通过API获取的游戏名称: {game_name}")
-                            
-                            if game_name and game_name == self.selected_game:
-                                game_folder = folder
-                                print(f"通过API名称匹配成功: {game_folder}")
-                                break
-                except Exception as e:
-                    print(f"读取appid文件失败: {e}")
-            
-            if not game_folder and folder == self.selected_game:
-                game_folder = folder
-                print(f"通过文件夹名匹配成功: {game_folder}")
-                break
-        
-        if not game_folder:
-            print("通过名称匹配失败，尝试通过文件夹名查找")
-            for folder in game_folders:
-                if folder == self.selected_game:
-                    game_folder = folder
-                    print(f"后备方案匹配成功: {game_folder}")
-                    break
-        
-        if not game_folder:
-            messagebox.showerror("错误", f"找不到选中游戏的文件夹: {self.selected_game}")
+        if not game_folder or not os.path.isdir(os.path.join(path, game_folder)):
+            messagebox.showerror("错误", f"找不到选中游戏的文件夹: {self.selected_game}，请重新扫描")
             print("查找游戏文件夹失败")
             return
         
@@ -434,15 +709,15 @@ class FolderRoulette:
             game_path = os.path.normpath(game_path)
             print(f"尝试启动游戏路径: {game_path}")
             
-            # 查找可执行文件
-            exe_files = []
-            for root, dirs, files in os.walk(game_path):
-                for file in files:
-                    if file.endswith('.exe') and not file.endswith('redistributable.exe') and not file.endswith('setup.exe'):
-                        exe_files.append(os.path.join(root, file))
+            # 查找可执行文件：通常已在扫描后的后台索引中，否则只向下查找有限的层数
+            exe_index = self.get_exe_index()
+            exe_path = exe_index.best(game_path, [self.selected_game])
+            try:
+                exe_index.save()
+            except OSError as e:
+                print(f"保存可执行文件索引失败: {e}")
             
-            if exe_files:
-                exe_path = exe_files[0]
+            if exe_path:
                 print(f"找到可执行文件: {exe_path}")
                 os.startfile(exe_path)
                 print("游戏启动命令已发送")